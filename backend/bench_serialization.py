@@ -0,0 +1,72 @@
+from fastapi.encoders import jsonable_encoder
+from bson import ObjectId
+from datetime import datetime
+import argparse
+import json
+import timeit
+
+from seed_data import profile_document, portfolio_documents
+from serialization import dumps, orjson, serialize_document, serialize_documents
+
+# Sections whose documents are repeated to build larger payloads
+SECTIONS = ["experiences", "projects", "certifications"]
+
+def build_documents(scale: int) -> dict:
+    """Seed payloads as MongoDB returns them, with the list sections repeated `scale` times"""
+    profile = {"_id": ObjectId(), **profile_document(), "created_at": datetime.utcnow()}
+    documents = portfolio_documents(profile["_id"])
+
+    sections = {}
+    for collection_name, section_documents in documents.items():
+        repeat = scale if collection_name in SECTIONS else 1
+        sections[collection_name] = [
+            {"_id": ObjectId(), **document, "created_at": datetime.utcnow()}
+            for _ in range(repeat)
+            for document in section_documents
+        ]
+    return {"profile": profile, "sections": sections}
+
+def legacy_encode(payload: dict) -> bytes:
+    """Per-endpoint ObjectId loop followed by FastAPI's jsonable_encoder and JSONResponse rendering"""
+    profile = dict(payload["profile"])
+    profile['id'] = str(profile['_id'])
+    del profile['_id']
+
+    data = {"profile": profile}
+    for collection_name, documents in payload["sections"].items():
+        documents = [dict(document) for document in documents]
+        for document in documents:
+            document['id'] = str(document['_id'])
+            if 'profile_id' in document:
+                document['profile_id'] = str(document['profile_id'])
+            del document['_id']
+        data[collection_name] = documents
+
+    content = jsonable_encoder({"success": True, "data": data, "message": "ok", "error": None})
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def fast_encode(payload: dict) -> bytes:
+    """Single-pass serializer followed by direct byte encoding"""
+    data = {"profile": serialize_document(payload["profile"])}
+    for collection_name, documents in payload["sections"].items():
+        data[collection_name] = serialize_documents(documents)
+    return dumps({"success": True, "data": data, "message": "ok", "error": None})
+
+def run(scales: list, number: int):
+    print(f"encoder: {'orjson' if orjson else 'json'}")
+    for scale in scales:
+        payload = build_documents(scale)
+        assert json.loads(legacy_encode(payload)) == json.loads(fast_encode(payload))
+
+        size = len(fast_encode(payload))
+        legacy = min(timeit.repeat(lambda: legacy_encode(payload), number=number, repeat=5)) / number
+        fast = min(timeit.repeat(lambda: fast_encode(payload), number=number, repeat=5)) / number
+        print(f"scale={scale:<4} bytes={size:<8} legacy={legacy * 1e6:9.1f}us  fast={fast * 1e6:9.1f}us  speedup={legacy / fast:5.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the legacy response encoding path with the serialization module")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="how many times to repeat the list sections")
+    parser.add_argument("--number", type=int, default=50, help="encodings per timing run")
+    args = parser.parse_args()
+
+    run(args.scales, args.number)
@@ -0,0 +1,135 @@
+from pymongo.errors import OperationFailure, PyMongoError
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+
+from database import Collections, WritePublisher, get_database, notify_collection_changed
+
+logger = logging.getLogger(__name__)
+
+# Collections whose writes must invalidate cached reads in every worker
+WATCHED_COLLECTIONS = [
+    Collections.PROFILES,
+    Collections.EXPERIENCES,
+    Collections.SKILLS,
+    Collections.PROJECTS,
+    Collections.CERTIFICATIONS,
+    Collections.EDUCATION,
+    Collections.STATISTICS,
+    Collections.CONTACT_SUBMISSIONS
+]
+
+# Sync mode: "auto" tries change streams and falls back to polling, "off" disables syncing
+CACHE_SYNC_MODE = os.environ.get('CACHE_SYNC_MODE', 'auto').lower()
+CACHE_SYNC_POLL_INTERVAL = float(os.environ.get('CACHE_SYNC_POLL_INTERVAL', 5))
+CACHE_SYNC_RETRY_INTERVAL = float(os.environ.get('CACHE_SYNC_RETRY_INTERVAL', 5))
+
+
+class ChangeWatcher:
+    task: Optional[asyncio.Task] = None
+    mode: str = "stopped"
+    revisions: Dict[str, int] = {}
+    resume_token: Optional[dict] = None
+
+
+def invalidate_all_collections(collections: List[str] = WATCHED_COLLECTIONS):
+    """Invalidate every watched collection, used when change events may have been missed"""
+    for collection_name in collections:
+        notify_collection_changed(collection_name)
+
+
+async def watch_change_stream():
+    """Invalidate cached entries for every change event on the watched collections"""
+    db = get_database()
+    pipeline = [{"$match": {"ns.coll": {"$in": WATCHED_COLLECTIONS}}}]
+
+    async with db.watch(pipeline, resume_after=ChangeWatcher.resume_token) as stream:
+        ChangeWatcher.mode = "change_stream"
+        # Every worker reaches the same deployment, so none of them falls back to polling revisions
+        WritePublisher.bump_revisions = False
+        logger.info("Cache sync watching MongoDB change stream")
+
+        async for change in stream:
+            ChangeWatcher.resume_token = stream.resume_token
+            collection_name = change.get("ns", {}).get("coll")
+            if collection_name:
+                notify_collection_changed(collection_name)
+            else:
+                # dropDatabase and invalidate events carry no collection
+                invalidate_all_collections()
+
+
+async def poll_revisions(interval: float):
+    """Invalidate cached entries whenever a collection revision moves on"""
+    db = get_database()
+    ChangeWatcher.mode = "polling"
+    WritePublisher.bump_revisions = True
+    logger.info(f"Cache sync polling collection revisions every {interval}s")
+
+    baseline_loaded = False
+    while True:
+        documents = await db[Collections.REVISIONS].find({}).to_list(None)
+        revisions = {document["_id"]: document.get("revision", 0) for document in documents}
+
+        if baseline_loaded:
+            for collection_name, revision in revisions.items():
+                if ChangeWatcher.revisions.get(collection_name) != revision:
+                    notify_collection_changed(collection_name)
+
+        ChangeWatcher.revisions = revisions
+        baseline_loaded = True
+        await asyncio.sleep(interval)
+
+
+async def run_change_watcher(mode: str = CACHE_SYNC_MODE):
+    """Keep caches in sync across workers, retrying after connection failures"""
+    use_change_stream = mode in ("auto", "change_stream")
+
+    while True:
+        try:
+            if use_change_stream:
+                await watch_change_stream()
+            else:
+                await poll_revisions(CACHE_SYNC_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if use_change_stream and mode == "auto":
+                # Standalone mongod and some hosted tiers do not support change streams
+                logger.warning(f"Change streams unavailable, falling back to revision polling: {e}")
+                use_change_stream = False
+                ChangeWatcher.resume_token = None
+                continue
+            logger.error(f"Cache sync failed: {e}")
+        except PyMongoError as e:
+            logger.error(f"Cache sync interrupted: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected cache sync error: {e}")
+
+        # Events may have been missed while disconnected
+        ChangeWatcher.mode = "reconnecting"
+        WritePublisher.bump_revisions = True
+        invalidate_all_collections()
+        await asyncio.sleep(CACHE_SYNC_RETRY_INTERVAL)
+
+
+async def start_change_watcher():
+    if CACHE_SYNC_MODE == "off":
+        logger.info("Cache sync disabled")
+        WritePublisher.bump_revisions = False
+        return
+
+    if ChangeWatcher.task is None or ChangeWatcher.task.done():
+        ChangeWatcher.task = asyncio.create_task(run_change_watcher())
+
+
+async def stop_change_watcher():
+    if ChangeWatcher.task:
+        ChangeWatcher.task.cancel()
+        try:
+            await ChangeWatcher.task
+        except asyncio.CancelledError:
+            pass
+        ChangeWatcher.task = None
+    ChangeWatcher.mode = "stopped"
@@ -0,0 +1,130 @@
+from bson import ObjectId
+import argparse
+import asyncio
+import logging
+import sys
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# Import database services after .env is loaded, as they read settings at import time
+from database import QUERY_SHAPES, Collections, connect_to_mongo, close_mongo_connection, ensure_indexes, get_database, plan_stages
+from materialized import statistics_pipeline
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Plan stages that mean a query is not served by an index
+FORBIDDEN_STAGES = {"COLLSCAN", "SORT"}
+
+# Value bound to $lookup variables when a sub-pipeline is explained on its own
+SAMPLE_ID = ObjectId()
+
+def bind_variables(value, variables: dict):
+    """Substitute $$variables the way a $lookup binds them for each input document"""
+    if isinstance(value, dict):
+        return {key: bind_variables(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [bind_variables(item, variables) for item in value]
+    if isinstance(value, str):
+        return variables.get(value, value)
+    return value
+
+def lookup_sub_pipelines(pipeline: list) -> list:
+    """Each $lookup sub-pipeline of an aggregation as a shape of its own, run against the joined collection"""
+    shapes = []
+    for stage in pipeline:
+        lookup = stage.get("$lookup")
+        if lookup and "pipeline" in lookup:
+            variables = {f"$${name}": SAMPLE_ID for name in lookup.get("let", {})}
+            shapes.append({"collection": lookup["from"], "pipeline": bind_variables(lookup["pipeline"], variables)})
+    return shapes
+
+def all_query_shapes() -> list:
+    """Every find and aggregation shape, including the $lookup sub-pipelines and the statistics refresh"""
+    # explain with executionStats rejects $merge, so the statistics refresh is checked without its final stage;
+    # recomputing every profile reads the whole profiles collection by design, so its scan is allowed
+    shapes = list(QUERY_SHAPES) + [
+        {"collection": Collections.PROFILES, "pipeline": statistics_pipeline([ObjectId()])[:-1]},
+        {"collection": Collections.PROFILES, "pipeline": statistics_pipeline(None)[:-1], "allowed_stages": {"COLLSCAN"}}
+    ]
+    for shape in list(shapes):
+        if "pipeline" in shape:
+            shapes.extend(sub_shape for sub_shape in lookup_sub_pipelines(shape["pipeline"]) if sub_shape not in shapes)
+    return shapes
+
+def aggregate_plan_stages(explanation: dict) -> list:
+    """Stage names of an aggregation plan; blocking $sort stages count as SORT, $lookups that scanned as COLLSCAN"""
+    stages = plan_stages(explanation.get("queryPlanner", {}).get("winningPlan"))
+    for stage in explanation.get("stages", []):
+        name = next(iter(stage))
+        if name == "$cursor":
+            stages.extend(plan_stages(stage["$cursor"].get("queryPlanner", {}).get("winningPlan")))
+        elif name == "$sort":
+            stages.append("SORT")
+        elif name == "$lookup" and stage.get("collectionScans"):
+            stages.append("COLLSCAN")
+        else:
+            stages.append(name)
+    return stages
+
+async def explain_shape(shape: dict) -> list:
+    """Run explain on a query shape and return the stages of its winning plan"""
+    db = get_database()
+    if "pipeline" in shape:
+        explanation = await db.command({
+            "explain": {"aggregate": shape["collection"], "pipeline": shape["pipeline"], "cursor": {}},
+            "verbosity": "executionStats"
+        })
+        return aggregate_plan_stages(explanation)
+    
+    cursor = db[shape["collection"]].find(shape["filter"])
+    if shape.get("sort"):
+        cursor = cursor.sort(shape["sort"])
+    if shape.get("limit"):
+        cursor = cursor.limit(shape["limit"])
+    
+    explanation = await cursor.explain()
+    return plan_stages(explanation["queryPlanner"]["winningPlan"])
+
+def describe_shape(shape: dict) -> str:
+    allowed = f" allowed={sorted(shape['allowed_stages'])}" if shape.get("allowed_stages") else ""
+    if "pipeline" in shape:
+        return f"{shape['collection']} pipeline={shape['pipeline']}{allowed}"
+    return f"{shape['collection']} filter={shape['filter']} sort={shape.get('sort')}{allowed}"
+
+async def check_query_plans(create_indexes: bool = False) -> bool:
+    """Explain every query shape DatabaseService issues and report COLLSCAN or in-memory SORT plans"""
+    await connect_to_mongo()
+    try:
+        if create_indexes:
+            await ensure_indexes()
+        
+        shapes = all_query_shapes()
+        failures = 0
+        for shape in shapes:
+            stages = await explain_shape(shape)
+            bad_stages = sorted(FORBIDDEN_STAGES.difference(shape.get("allowed_stages", ())).intersection(stages))
+            description = describe_shape(shape)
+            
+            if bad_stages:
+                failures += 1
+                logger.error(f"FAIL {description}: {' -> '.join(stages)}")
+            else:
+                logger.info(f"OK   {description}: {' -> '.join(stages)}")
+        
+        logger.info(f"{len(shapes) - failures}/{len(shapes)} query shapes use an index")
+        return failures == 0
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify that every DatabaseService query shape is served by an index")
+    parser.add_argument("--ensure-indexes", action="store_true", help="create the declared indexes before checking")
+    args = parser.parse_args()
+    
+    passed = asyncio.run(check_query_plans(args.ensure_indexes))
+    sys.exit(0 if passed else 1)
@@ -1,8 +1,22 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+from pymongo.errors import BulkWriteError, ConnectionFailure, ExecutionTimeout, PyMongoError
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Awaitable, Callable, AsyncIterator
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+import asyncio
+import copy
+import functools
+import importlib.util
 import logging
+import random
+import time
+
+from metrics import instrumented
+from tracing import traced
+from pool_metrics import pool_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -14,71 +28,388 @@ class Database:
 def get_database():
     return Database.database
 
+# Number of documents fetched per cursor batch when streaming query results
+CURSOR_BATCH_SIZE = int(os.environ.get('DB_CURSOR_BATCH_SIZE', 100))
+
+# Number of operations sent per bulk_write batch
+BULK_WRITE_BATCH_SIZE = int(os.environ.get('DB_BULK_WRITE_BATCH_SIZE', 1000))
+
+# Deadlines: reads are aborted server-side after DB_QUERY_MAX_TIME_MS, every round-trip client-side after DB_OPERATION_TIMEOUT_MS
+DB_QUERY_MAX_TIME_MS = int(os.environ.get('DB_QUERY_MAX_TIME_MS', 2000))
+DB_OPERATION_TIMEOUT = float(os.environ.get('DB_OPERATION_TIMEOUT_MS', 3000)) / 1000
+DB_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('DB_SERVER_SELECTION_TIMEOUT_MS', 2000))
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+# Connection pool settings; size it to the worker's concurrency, unset optional values keep the driver defaults
+DB_MAX_POOL_SIZE = int(os.environ.get('DB_MAX_POOL_SIZE', 100))
+DB_MIN_POOL_SIZE = int(os.environ.get('DB_MIN_POOL_SIZE', 0))
+DB_MAX_CONNECTING = int(os.environ.get('DB_MAX_CONNECTING', 2))
+DB_MAX_IDLE_TIME_MS = _optional_int('DB_MAX_IDLE_TIME_MS')
+DB_WAIT_QUEUE_TIMEOUT_MS = _optional_int('DB_WAIT_QUEUE_TIMEOUT_MS')
+DB_CONNECT_TIMEOUT_MS = int(os.environ.get('DB_CONNECT_TIMEOUT_MS', 2000))
+DB_SOCKET_TIMEOUT_MS = _optional_int('DB_SOCKET_TIMEOUT_MS')
+
+# Wire compression in preference order, e.g. "zstd,snappy,zlib"; zstd and snappy need their optional packages
+DB_COMPRESSORS = [name.strip() for name in os.environ.get('DB_COMPRESSORS', '').split(',') if name.strip()]
+DB_ZLIB_COMPRESSION_LEVEL = _optional_int('DB_ZLIB_COMPRESSION_LEVEL')
+
+# Connections opened at startup so the first requests do not pay for connection setup
+DB_POOL_WARMUP_CONNECTIONS = int(os.environ.get('DB_POOL_WARMUP_CONNECTIONS', max(1, DB_MIN_POOL_SIZE)))
+
+# Module each wire compressor needs
+COMPRESSOR_MODULES = {
+    "zstd": "zstandard",
+    "snappy": "snappy",
+    "zlib": "zlib"
+}
+
+# Circuit breaker: open after this many consecutive failures, probe again after the reset timeout
+DB_BREAKER_ENABLED = os.environ.get('DB_BREAKER_ENABLED', 'true').lower() == 'true'
+DB_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('DB_BREAKER_FAILURE_THRESHOLD', 5))
+DB_BREAKER_RESET_TIMEOUT = float(os.environ.get('DB_BREAKER_RESET_TIMEOUT', 10))
+
+# Slow-query log: operations slower than DB_SLOW_QUERY_MS are logged, a sample of them explained in the background,
+# each query shape at most once per DB_SLOW_QUERY_EXPLAIN_INTERVAL seconds
+DB_SLOW_QUERY_LOG_ENABLED = os.environ.get('DB_SLOW_QUERY_LOG_ENABLED', 'true').lower() == 'true'
+DB_SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', 100))
+DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.environ.get('DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1))
+DB_SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get('DB_SLOW_QUERY_EXPLAIN_INTERVAL', 300))
+
+# Change listeners, notified whenever DatabaseService writes to a collection
+_change_listeners: List[Callable[[str], None]] = []
+
+def register_change_listener(listener: Callable[[str], None]):
+    _change_listeners.append(listener)
+
+def notify_collection_changed(collection_name: str):
+    for listener in _change_listeners:
+        try:
+            listener(collection_name)
+        except Exception as e:
+            logger.error(f"Error notifying change listener for {collection_name}: {e}")
+
+# Write hooks, run in the background after DatabaseService writes with the profile ids the write touched
+# (None when they are not known, e.g. after a bulk write)
+_write_hooks: List[Callable[[str, Optional[List[ObjectId]]], Any]] = []
+
+def register_write_hook(hook: Callable[[str, Optional[List[ObjectId]]], Any]):
+    _write_hooks.append(hook)
+
+def profile_ids_of(documents: List[Optional[dict]]) -> List[ObjectId]:
+    return list({document["profile_id"] for document in documents if document and document.get("profile_id")})
+
+class WritePublisher:
+    """Follow-up work of writes, run in the background so the write returns without waiting for it"""
+    # Revisions only feed the polling fallback of cache sync; the change watcher turns them off while no worker polls
+    bump_revisions: bool = True
+    tasks: set = set()
+
+    @classmethod
+    async def run(cls, collection_name: str, profile_ids: Optional[List[ObjectId]]):
+        if cls.bump_revisions:
+            try:
+                await database_breaker.call(lambda: get_database()[Collections.REVISIONS].update_one(
+                    {"_id": collection_name},
+                    {"$inc": {"revision": 1}},
+                    upsert=True
+                ))
+            except Exception as e:
+                logger.error(f"Error bumping revision for {collection_name}: {e}")
+        
+        for hook in _write_hooks:
+            try:
+                await hook(collection_name, profile_ids)
+            except Exception as e:
+                logger.error(f"Error running write hook for {collection_name}: {e}")
+
+async def publish_collection_change(collection_name: str, profile_ids: Optional[List[ObjectId]] = None):
+    """Notify local listeners, then bump the collection revision and run write hooks in the background"""
+    notify_collection_changed(collection_name)
+    task = asyncio.ensure_future(WritePublisher.run(collection_name, profile_ids))
+    WritePublisher.tasks.add(task)
+    task.add_done_callback(WritePublisher.tasks.discard)
+
+async def drain_write_tasks():
+    """Wait for the follow-up work of earlier writes, e.g. before shutting down"""
+    while WritePublisher.tasks:
+        await asyncio.gather(*WritePublisher.tasks, return_exceptions=True)
+
+def available_compressors(requested: List[str]) -> List[str]:
+    """Drop compressors that are unknown or whose package is not installed"""
+    compressors = []
+    for name in requested:
+        module = COMPRESSOR_MODULES.get(name)
+        if module is None:
+            logger.warning(f"Ignoring unknown MongoDB compressor {name}")
+        elif importlib.util.find_spec(module) is None:
+            logger.warning(f"Ignoring MongoDB compressor {name}, the {module} package is not installed")
+        else:
+            compressors.append(name)
+    return compressors
+
+def mongo_client_options() -> dict:
+    """Keyword arguments for AsyncIOMotorClient built from the DB_* settings"""
+    options = {
+        "maxPoolSize": DB_MAX_POOL_SIZE,
+        "minPoolSize": DB_MIN_POOL_SIZE,
+        "maxConnecting": DB_MAX_CONNECTING,
+        "connectTimeoutMS": DB_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": DB_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [pool_metrics]
+    }
+    optional_options = {
+        "maxIdleTimeMS": DB_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": DB_WAIT_QUEUE_TIMEOUT_MS,
+        "socketTimeoutMS": DB_SOCKET_TIMEOUT_MS,
+        "zlibCompressionLevel": DB_ZLIB_COMPRESSION_LEVEL
+    }
+    options.update({name: value for name, value in optional_options.items() if value is not None})
+    
+    compressors = available_compressors(DB_COMPRESSORS)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
 # Initialize database connection
 async def connect_to_mongo():
     try:
-        Database.client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        Database.client = AsyncIOMotorClient(os.environ['MONGO_URL'], **mongo_client_options())
         Database.database = Database.client[os.environ['DB_NAME']]
+        ActiveProfile.invalidate()
         logger.info("Connected to MongoDB successfully")
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise
 
+async def warm_up_connection_pool(connections: int = DB_POOL_WARMUP_CONNECTIONS):
+    """Select a server and open pool connections before the first request needs them"""
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            database_breaker.call(lambda: Database.client.admin.command("ping"))
+            for _ in range(connections)
+        ))
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(f"MongoDB connection pool warmed up in {elapsed:.0f}ms ({pool_metrics.open_connections} connections open)")
+    except Exception as e:
+        logger.error(f"MongoDB connection pool warm-up failed, connections will be opened on demand: {e}")
+
+def connection_pool_stats() -> dict:
+    return {
+        "max_pool_size": DB_MAX_POOL_SIZE,
+        "min_pool_size": DB_MIN_POOL_SIZE,
+        **pool_metrics.stats()
+    }
+
 async def close_mongo_connection():
     if Database.client:
         Database.client.close()
         logger.info("Disconnected from MongoDB")
 
+# Read-through caching for DatabaseService queries
+def cached_query(func):
+    """Serve a DatabaseService read from the query cache, sharing one load between concurrent misses"""
+    @functools.wraps(func)
+    async def wrapper(collection_name: str, *args, **kwargs):
+        key = (func.__name__, collection_name, repr(args), repr(sorted(kwargs.items())))
+        cache_enabled = query_cache.is_enabled_for(collection_name)
+        if cache_enabled:
+            found, value = query_cache.get(key)
+            if found:
+                return value
+        
+        generation = query_cache.generation(collection_name)
+        
+        async def load():
+            value = await func(collection_name, *args, **kwargs)
+            if cache_enabled:
+                query_cache.set(collection_name, key, value, generation)
+            return value
+        
+        # Callers arriving after a write get a load of their own instead of joining one that started before it
+        return await single_flight.run(key + (generation,), load)
+    return wrapper
+
+# Slow-query logging for DatabaseService round-trips
+async def timed_query(collection_name: str, command: dict, operation: Callable[[], Awaitable]) -> Any:
+    """Run a query under the circuit breaker, reporting it to the slow-query log when it exceeds the threshold"""
+    # `command` is the equivalent database command, which is what gets explained when the query is slow
+    started = time.perf_counter()
+    try:
+        return await database_breaker.call(operation)
+    finally:
+        duration = time.perf_counter() - started
+        if slow_query_log.is_slow(duration):
+            slow_query_log.record(collection_name, command, duration)
+
+async def iter_cursor(cursor, batch_size: int) -> AsyncIterator[dict]:
+    """Drain a cursor one batch at a time, each fetch under the circuit breaker and its deadline"""
+    while True:
+        documents = await database_breaker.call(lambda: cursor.to_list(batch_size))
+        for document in documents:
+            yield document
+        if len(documents) < batch_size:
+            return
+
 # Helper functions for database operations
 class DatabaseService:
     
     @staticmethod
+    @traced
+    @instrumented
     async def create_document(collection_name: str, document: dict) -> dict:
         """Create a new document in the specified collection"""
         try:
             db = get_database()
-            result = await db[collection_name].insert_one(document)
-            
-            # Retrieve the created document
-            created_doc = await db[collection_name].find_one({"_id": result.inserted_id})
-            return created_doc
+            # insert_one sets the generated _id on the document, so no read-back is needed
+            await database_breaker.call(lambda: db[collection_name].insert_one(document))
+            await publish_collection_change(collection_name, profile_ids_of([document]))
+            return document
         except Exception as e:
             logger.error(f"Error creating document in {collection_name}: {e}")
             raise
 
     @staticmethod
-    async def get_document_by_id(collection_name: str, document_id: str) -> Optional[dict]:
+    @traced
+    @instrumented
+    async def create_documents(collection_name: str, documents: List[dict], ordered: bool = True) -> List[dict]:
+        """Create multiple documents in the specified collection with a single insert_many"""
+        try:
+            if not documents:
+                return []
+            
+            db = get_database()
+            try:
+                # Bulk inserts get the breaker but no client deadline, their duration grows with their size
+                await database_breaker.call(lambda: db[collection_name].insert_many(documents, ordered=ordered), timeout=None)
+            finally:
+                await publish_collection_change(collection_name, profile_ids_of(documents))
+            return documents
+        except Exception as e:
+            logger.error(f"Error creating documents in {collection_name}: {e}")
+            raise
+
+    @staticmethod
+    @traced
+    @instrumented
+    async def bulk_write(collection_name: str, operations: List[Any], ordered: bool = True, batch_size: int = None) -> dict:
+        """Apply pymongo write operations (InsertOne, UpdateOne, DeleteOne, ...) in batches"""
+        batch_size = batch_size or BULK_WRITE_BATCH_SIZE
+        totals = {
+            "inserted_count": 0,
+            "matched_count": 0,
+            "modified_count": 0,
+            "deleted_count": 0,
+            "upserted_count": 0
+        }
+        
+        try:
+            db = get_database()
+            for start in range(0, len(operations), batch_size):
+                batch = operations[start:start + batch_size]
+                try:
+                    result = await database_breaker.call(lambda: db[collection_name].bulk_write(batch, ordered=ordered), timeout=None)
+                except BulkWriteError as e:
+                    # Unordered batches keep going past failed operations
+                    if ordered:
+                        raise
+                    logger.error(f"Bulk write errors in {collection_name}: {e.details.get('writeErrors')}")
+                    result_counts = {
+                        "inserted_count": e.details.get("nInserted", 0),
+                        "matched_count": e.details.get("nMatched", 0),
+                        "modified_count": e.details.get("nModified", 0),
+                        "deleted_count": e.details.get("nRemoved", 0),
+                        "upserted_count": e.details.get("nUpserted", 0)
+                    }
+                else:
+                    result_counts = {
+                        "inserted_count": result.inserted_count,
+                        "matched_count": result.matched_count,
+                        "modified_count": result.modified_count,
+                        "deleted_count": result.deleted_count,
+                        "upserted_count": result.upserted_count
+                    }
+                for key, count in result_counts.items():
+                    totals[key] += count
+            return totals
+        except Exception as e:
+            logger.error(f"Error running bulk write on {collection_name}: {e}")
+            raise
+        finally:
+            if operations:
+                await publish_collection_change(collection_name)
+
+    @staticmethod
+    @traced
+    @cached_query
+    @instrumented
+    async def get_document_by_id(collection_name: str, document_id: str, projection: Optional[dict] = None) -> Optional[dict]:
         """Get a document by its ID"""
         try:
             db = get_database()
             if not ObjectId.is_valid(document_id):
                 return None
             
-            document = await db[collection_name].find_one({"_id": ObjectId(document_id)})
+            filter_dict = {"_id": ObjectId(document_id)}
+            document = await timed_query(
+                collection_name,
+                {"find": collection_name, "filter": filter_dict, "limit": 1},
+                lambda: db[collection_name].find_one(filter_dict, projection, max_time_ms=DB_QUERY_MAX_TIME_MS)
+            )
             return document
         except Exception as e:
             logger.error(f"Error getting document by ID from {collection_name}: {e}")
             raise
 
     @staticmethod
-    async def get_documents(collection_name: str, filter_dict: dict = None, sort_field: str = None, sort_order: int = 1) -> List[dict]:
+    @traced
+    @cached_query
+    @instrumented
+    async def get_documents_by_ids(collection_name: str, document_ids: List[str], projection: Optional[dict] = None) -> List[dict]:
+        """Get several documents by their IDs with a single $in query"""
+        try:
+            db = get_database()
+            object_ids = [ObjectId(document_id) for document_id in document_ids if ObjectId.is_valid(document_id)]
+            if not object_ids:
+                return []
+            
+            filter_dict = {"_id": {"$in": object_ids}}
+            query = db[collection_name].find(filter_dict, projection).max_time_ms(DB_QUERY_MAX_TIME_MS)
+            documents = await timed_query(collection_name, {"find": collection_name, "filter": filter_dict}, lambda: query.to_list(None))
+            return documents
+        except Exception as e:
+            logger.error(f"Error getting documents by IDs from {collection_name}: {e}")
+            raise
+
+    @staticmethod
+    @traced
+    @cached_query
+    @instrumented
+    async def get_documents(collection_name: str, filter_dict: dict = None, sort_field: str = None, sort_order: int = 1, projection: Optional[dict] = None) -> List[dict]:
         """Get multiple documents from a collection"""
         try:
             db = get_database()
             filter_dict = filter_dict or {}
             
-            query = db[collection_name].find(filter_dict)
+            query = db[collection_name].find(filter_dict, projection).max_time_ms(DB_QUERY_MAX_TIME_MS)
             
+            command = {"find": collection_name, "filter": filter_dict}
             if sort_field:
                 query = query.sort(sort_field, sort_order)
+                command["sort"] = {sort_field: sort_order}
             
-            documents = await query.to_list(1000)
+            documents = await timed_query(collection_name, command, lambda: query.to_list(None))
             return documents
         except Exception as e:
             logger.error(f"Error getting documents from {collection_name}: {e}")
             raise
 
     @staticmethod
+    @traced
+    @instrumented
     async def update_document(collection_name: str, document_id: str, update_data: dict) -> Optional[dict]:
         """Update a document by its ID"""
         try:
@@ -86,20 +417,24 @@ class DatabaseService:
             if not ObjectId.is_valid(document_id):
                 return None
             
-            result = await db[collection_name].update_one(
-                {"_id": ObjectId(document_id)}, 
-                {"$set": update_data}
+            # find_one_and_update returns the updated document in the same round-trip
+            filter_dict = {"_id": ObjectId(document_id)}
+            updated_doc = await timed_query(
+                collection_name,
+                {"findAndModify": collection_name, "query": filter_dict, "update": {"$set": update_data}, "new": True},
+                lambda: db[collection_name].find_one_and_update(filter_dict, {"$set": update_data}, return_document=ReturnDocument.AFTER)
             )
             
-            if result.modified_count:
-                updated_doc = await db[collection_name].find_one({"_id": ObjectId(document_id)})
-                return updated_doc
-            return None
+            if updated_doc:
+                await publish_collection_change(collection_name, profile_ids_of([updated_doc]))
+            return updated_doc
         except Exception as e:
             logger.error(f"Error updating document in {collection_name}: {e}")
             raise
 
     @staticmethod
+    @traced
+    @instrumented
     async def delete_document(collection_name: str, document_id: str) -> bool:
         """Delete a document by its ID"""
         try:
@@ -107,23 +442,40 @@ class DatabaseService:
             if not ObjectId.is_valid(document_id):
                 return False
             
-            result = await db[collection_name].delete_one({"_id": ObjectId(document_id)})
-            return result.deleted_count > 0
+            # find_one_and_delete hands back the profile_id the deletion affected
+            filter_dict = {"_id": ObjectId(document_id)}
+            deleted_doc = await timed_query(
+                collection_name,
+                {"findAndModify": collection_name, "query": filter_dict, "remove": True},
+                lambda: db[collection_name].find_one_and_delete(filter_dict, projection={"profile_id": 1})
+            )
+            if deleted_doc:
+                await publish_collection_change(collection_name, profile_ids_of([deleted_doc]))
+            return deleted_doc is not None
         except Exception as e:
             logger.error(f"Error deleting document from {collection_name}: {e}")
             raise
 
     @staticmethod
-    async def get_documents_by_profile_id(collection_name: str, profile_id: str, sort_field: str = "order") -> List[dict]:
-        """Get documents filtered by profile_id"""
+    @traced
+    @cached_query
+    @instrumented
+    async def get_documents_by_profile_id(collection_name: str, profile_id: str, sort_field: str = "order", projection: Optional[dict] = None, limit: Optional[int] = None, after: Optional[tuple] = None) -> List[dict]:
+        """Get documents filtered by profile_id, optionally one keyset page at a time"""
         try:
             db = get_database()
             if not ObjectId.is_valid(profile_id):
                 return []
             
-            documents = await db[collection_name].find(
-                {"profile_id": ObjectId(profile_id)}
-            ).sort(sort_field, 1).to_list(1000)
+            filter_dict = DatabaseService.profile_filter(profile_id, sort_field, after)
+            query = db[collection_name].find(filter_dict, projection).sort([(sort_field, 1), ("_id", 1)]).max_time_ms(DB_QUERY_MAX_TIME_MS)
+            command = {"find": collection_name, "filter": filter_dict, "sort": {sort_field: 1, "_id": 1}}
+            
+            if limit:
+                query = query.limit(limit)
+                command["limit"] = limit
+            
+            documents = await timed_query(collection_name, command, lambda: query.to_list(None))
             
             return documents
         except Exception as e:
@@ -131,17 +483,147 @@ class DatabaseService:
             raise
 
     @staticmethod
+    @traced
+    @cached_query
+    @instrumented
+    async def get_documents_by_profile_ids(collection_name: str, profile_ids: List[str], sort_field: str = "order", projection: Optional[dict] = None) -> List[dict]:
+        """Get the documents of several profiles with a single $in query, grouped by profile_id"""
+        try:
+            db = get_database()
+            object_ids = [ObjectId(profile_id) for profile_id in profile_ids if ObjectId.is_valid(profile_id)]
+            if not object_ids:
+                return []
+            
+            filter_dict = {"profile_id": {"$in": object_ids}}
+            query = db[collection_name].find(filter_dict, projection).sort([("profile_id", 1), (sort_field, 1), ("_id", 1)]).max_time_ms(DB_QUERY_MAX_TIME_MS)
+            command = {"find": collection_name, "filter": filter_dict, "sort": {"profile_id": 1, sort_field: 1, "_id": 1}}
+            
+            documents = await timed_query(collection_name, command, lambda: query.to_list(None))
+            return documents
+        except Exception as e:
+            logger.error(f"Error getting documents by profile_ids from {collection_name}: {e}")
+            raise
+
+    @staticmethod
+    def profile_filter(profile_id: str, sort_field: str = "order", after: Optional[tuple] = None) -> dict:
+        """Build a profile_id filter, resuming after a (sort value, _id) keyset position"""
+        filter_dict = {"profile_id": ObjectId(profile_id)}
+        if after:
+            after_value, after_id = after
+            filter_dict["$or"] = [
+                {sort_field: {"$gt": after_value}},
+                {sort_field: after_value, "_id": {"$gt": ObjectId(after_id)}}
+            ]
+        return filter_dict
+
+    @staticmethod
+    @traced
+    @instrumented
+    async def iter_documents(collection_name: str, filter_dict: dict = None, sort_field: str = None, sort_order: int = 1, projection: Optional[dict] = None, batch_size: int = None) -> AsyncIterator[dict]:
+        """Stream documents from a collection, fetching them from the cursor in batches"""
+        try:
+            db = get_database()
+            filter_dict = filter_dict or {}
+            batch_size = batch_size or CURSOR_BATCH_SIZE
+            
+            query = db[collection_name].find(filter_dict, projection, batch_size=batch_size)
+            query = query.max_time_ms(DB_QUERY_MAX_TIME_MS)
+            
+            if sort_field:
+                query = query.sort(sort_field, sort_order)
+            
+            async for document in iter_cursor(query, batch_size):
+                yield document
+        except Exception as e:
+            logger.error(f"Error streaming documents from {collection_name}: {e}")
+            raise
+
+    @staticmethod
+    @traced
+    @instrumented
+    async def iter_documents_by_profile_id(collection_name: str, profile_id: str, sort_field: str = "order", projection: Optional[dict] = None, batch_size: int = None, limit: Optional[int] = None, after: Optional[tuple] = None) -> AsyncIterator[dict]:
+        """Stream documents filtered by profile_id, fetching them from the cursor in batches"""
+        try:
+            db = get_database()
+            if not ObjectId.is_valid(profile_id):
+                return
+            batch_size = batch_size or CURSOR_BATCH_SIZE
+            
+            query = db[collection_name].find(
+                DatabaseService.profile_filter(profile_id, sort_field, after),
+                projection,
+                batch_size=batch_size
+            ).sort([(sort_field, 1), ("_id", 1)]).max_time_ms(DB_QUERY_MAX_TIME_MS)
+            
+            if limit:
+                query = query.limit(limit)
+            
+            async for document in iter_cursor(query, batch_size):
+                yield document
+        except Exception as e:
+            logger.error(f"Error streaming documents by profile_id from {collection_name}: {e}")
+            raise
+
+    @staticmethod
+    @traced
+    @cached_query
+    @instrumented
     async def count_documents(collection_name: str, filter_dict: dict = None) -> int:
         """Count documents in a collection"""
         try:
             db = get_database()
             filter_dict = filter_dict or {}
-            count = await db[collection_name].count_documents(filter_dict)
+            count = await timed_query(
+                collection_name,
+                {"count": collection_name, "query": filter_dict},
+                lambda: db[collection_name].count_documents(filter_dict, maxTimeMS=DB_QUERY_MAX_TIME_MS)
+            )
             return count
         except Exception as e:
             logger.error(f"Error counting documents in {collection_name}: {e}")
             raise
 
+    @staticmethod
+    @traced
+    @instrumented
+    async def aggregate(collection_name: str, pipeline: List[dict]) -> List[dict]:
+        """Run an aggregation pipeline against a collection"""
+        try:
+            db = get_database()
+            documents = await timed_query(
+                collection_name,
+                {"aggregate": collection_name, "pipeline": pipeline, "cursor": {}},
+                lambda: db[collection_name].aggregate(pipeline, maxTimeMS=DB_QUERY_MAX_TIME_MS).to_list(None)
+            )
+            return documents
+        except Exception as e:
+            logger.error(f"Error running aggregation on {collection_name}: {e}")
+            raise
+
+    @staticmethod
+    def profile_bundle_pipeline(child_collections: List[str], sort_field: str = "order") -> List[dict]:
+        """The first profile with each child collection joined in by a $lookup sub-pipeline"""
+        pipeline = [{"$sort": {"_id": 1}}, {"$limit": 1}]
+        for child_collection in child_collections:
+            pipeline.append({
+                "$lookup": {
+                    "from": child_collection,
+                    "let": {"profile_id": "$_id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$profile_id", "$$profile_id"]}}},
+                        {"$sort": {sort_field: 1, "_id": 1}}
+                    ],
+                    "as": child_collection
+                }
+            })
+        return pipeline
+
+    @staticmethod
+    async def get_profile_bundle(child_collections: List[str], sort_field: str = "order") -> Optional[dict]:
+        """Get the profile joined with all of its child collections in a single aggregation"""
+        bundles = await DatabaseService.aggregate(Collections.PROFILES, DatabaseService.profile_bundle_pipeline(child_collections, sort_field))
+        return bundles[0] if bundles else None
+
 # Collection names
 class Collections:
     PROFILES = "profiles"
@@ -150,4 +632,591 @@ class Collections:
     PROJECTS = "projects"
     CERTIFICATIONS = "certifications"
     CONTACT_SUBMISSIONS = "contact_submissions"
-    EDUCATION = "education"
\ No newline at end of file
+    EDUCATION = "education"
+    REVISIONS = "collection_revisions"
+    STATISTICS = "statistics"
+
+# Child collections holding per-profile documents ordered by `order`
+PROFILE_CHILD_COLLECTIONS = [
+    Collections.EXPERIENCES,
+    Collections.SKILLS,
+    Collections.PROJECTS,
+    Collections.CERTIFICATIONS,
+    Collections.EDUCATION
+]
+
+# Indexes provisioned at startup by ensure_indexes
+COLLECTION_INDEXES = {
+    **{
+        collection_name: [
+            IndexModel([("profile_id", ASCENDING), ("order", ASCENDING), ("_id", ASCENDING)], name="profile_id_order")
+        ]
+        for collection_name in PROFILE_CHILD_COLLECTIONS
+    },
+    Collections.CONTACT_SUBMISSIONS: [
+        IndexModel([("status", ASCENDING), ("submitted_at", DESCENDING)], name="status_submitted_at")
+    ]
+}
+
+# Query shapes issued against the database, verified against their plans by check_query_plans.py
+QUERY_SHAPES = [
+    {"collection": Collections.PROFILES, "filter": {}, "sort": [("_id", ASCENDING)], "limit": 1},
+    {"collection": Collections.STATISTICS, "filter": {"_id": ObjectId()}},
+    {"collection": Collections.STATISTICS, "filter": {"_id": {"$in": [ObjectId(), ObjectId()]}}},
+    {"collection": Collections.REVISIONS, "filter": {"_id": Collections.PROFILES}},
+    *[
+        {"collection": collection_name, "filter": {"profile_id": ObjectId()}, "sort": [("order", ASCENDING), ("_id", ASCENDING)]}
+        for collection_name in PROFILE_CHILD_COLLECTIONS
+    ],
+    *[
+        {
+            "collection": collection_name,
+            "filter": {"profile_id": {"$in": [ObjectId(), ObjectId()]}},
+            "sort": [("profile_id", ASCENDING), ("order", ASCENDING), ("_id", ASCENDING)]
+        }
+        for collection_name in PROFILE_CHILD_COLLECTIONS
+    ],
+    *[
+        {
+            "collection": collection_name,
+            "filter": DatabaseService.profile_filter(str(ObjectId()), "order", (0, str(ObjectId()))),
+            "sort": [("order", ASCENDING), ("_id", ASCENDING)],
+            "limit": 21
+        }
+        for collection_name in PROFILE_CHILD_COLLECTIONS
+    ],
+    {"collection": Collections.CONTACT_SUBMISSIONS, "filter": {"status": "new"}, "sort": [("submitted_at", DESCENDING)]},
+    {"collection": Collections.PROFILES, "pipeline": DatabaseService.profile_bundle_pipeline(PROFILE_CHILD_COLLECTIONS)}
+]
+
+async def ensure_indexes():
+    """Create every declared index; existing indexes with the same spec are left untouched"""
+    db = get_database()
+    for collection_name, indexes in COLLECTION_INDEXES.items():
+        try:
+            await db[collection_name].create_indexes(indexes)
+        except Exception as e:
+            logger.error(f"Error creating indexes on {collection_name}: {e}")
+            raise
+    logger.info("Database indexes are in place")
+
+# Startup index creation; a worker starts even when MongoDB is unreachable, retrying in the background
+DB_INDEX_RETRY_INTERVAL = float(os.environ.get('DB_INDEX_RETRY_INTERVAL', 30))
+DB_INDEX_RETRY_MAX_INTERVAL = float(os.environ.get('DB_INDEX_RETRY_MAX_INTERVAL', 600))
+
+class IndexBuilder:
+    ready: bool = False
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def build(cls) -> bool:
+        try:
+            await ensure_indexes()
+            cls.ready = True
+            cls.error = None
+        except Exception as e:
+            cls.error = str(e) or type(e).__name__
+        return cls.ready
+
+    @classmethod
+    async def retry(cls):
+        interval = DB_INDEX_RETRY_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            if await cls.build():
+                return
+            interval = min(interval * 2, DB_INDEX_RETRY_MAX_INTERVAL)
+
+async def start_index_builder():
+    """Create the declared indexes, retrying in the background instead of failing startup"""
+    if await IndexBuilder.build():
+        return
+    logger.error(f"Database indexes could not be created, retrying in the background: {IndexBuilder.error}")
+    IndexBuilder.task = asyncio.ensure_future(IndexBuilder.retry())
+
+async def stop_index_builder():
+    if IndexBuilder.task:
+        IndexBuilder.task.cancel()
+        try:
+            await IndexBuilder.task
+        except asyncio.CancelledError:
+            pass
+        IndexBuilder.task = None
+
+# Process-wide resolver for the active profile
+class ActiveProfile:
+    """Caches the active (first) profile so handlers do not look it up on every request"""
+    _profile: Optional[dict] = None
+    _loaded: bool = False
+    _generation: int = 0
+    _lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    async def get(cls) -> Optional[dict]:
+        """Get a copy of the active profile document, loading it on first use"""
+        if not cls._loaded:
+            if cls._lock is None:
+                cls._lock = asyncio.Lock()
+            async with cls._lock:
+                if not cls._loaded:
+                    generation = cls._generation
+                    try:
+                        profile = await database_breaker.call(lambda: get_database()[Collections.PROFILES].find_one(
+                            {}, sort=[("_id", ASCENDING)], max_time_ms=DB_QUERY_MAX_TIME_MS
+                        ))
+                    except Exception as e:
+                        logger.error(f"Error resolving active profile: {e}")
+                        raise
+                    
+                    # Only publish the result if no profile write happened while loading
+                    if generation == cls._generation:
+                        cls._profile = profile
+                        cls._loaded = True
+                    return dict(profile) if profile else None
+        
+        return dict(cls._profile) if cls._profile else None
+
+    @classmethod
+    async def get_id(cls) -> Optional[str]:
+        """Get the active profile id as a string"""
+        profile = await cls.get()
+        return str(profile['_id']) if profile else None
+
+    @classmethod
+    def invalidate(cls):
+        """Drop the cached profile so the next lookup reloads it"""
+        cls._generation += 1
+        cls._profile = None
+        cls._loaded = False
+
+
+def _invalidate_active_profile(collection_name: str):
+    if collection_name == Collections.PROFILES:
+        ActiveProfile.invalidate()
+
+register_change_listener(_invalidate_active_profile)
+
+
+class QueryCache:
+    """Bounded LRU cache of query results with per-collection TTLs"""
+
+    def __init__(self, enabled: bool, max_entries: int, default_ttl: float, ttls: Dict[str, float]):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = ttls
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._keys_by_collection: Dict[str, set] = {}
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ttl_for(self, collection_name: str) -> float:
+        return self.ttls.get(collection_name, self.default_ttl)
+
+    def is_enabled_for(self, collection_name: str) -> bool:
+        return self.enabled and self.max_entries > 0 and self.ttl_for(collection_name) > 0
+
+    def generation(self, collection_name: str) -> int:
+        return self._generations.get(collection_name, 0)
+
+    def get(self, key: tuple) -> tuple:
+        """Return (found, value) for a key, counting the lookup as a hit or miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, collection_name, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(value)
+            self._remove(key)
+        
+        self.misses += 1
+        return False, None
+
+    def set(self, collection_name: str, key: tuple, value: Any, generation: int):
+        # Skip results that were loaded while the collection was being written to
+        if generation != self.generation(collection_name):
+            return
+        
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + self.ttl_for(collection_name)
+        self._entries[key] = (expires_at, collection_name, copy.deepcopy(value))
+        self._keys_by_collection.setdefault(collection_name, set()).add(key)
+        
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def invalidate_collection(self, collection_name: str):
+        """Drop every cached result for a collection"""
+        self._generations[collection_name] = self.generation(collection_name) + 1
+        keys = self._keys_by_collection.pop(collection_name, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        if keys:
+            self.invalidations += 1
+
+    def clear(self):
+        for collection_name in list(self._keys_by_collection):
+            self.invalidate_collection(collection_name)
+
+    def _remove(self, key: tuple):
+        _, collection_name, _ = self._entries.pop(key)
+        keys = self._keys_by_collection.get(collection_name)
+        if keys is not None:
+            keys.discard(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+class SingleFlight:
+    """Run concurrent identical loads once, every caller awaiting the same in-flight task"""
+    
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._flights: Dict[tuple, asyncio.Task] = {}
+        self._waiters: Dict[tuple, int] = {}
+        self.loads = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+    
+    async def run(self, key: tuple, load: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return await load()
+        
+        task = self._flights.get(key)
+        leader = task is None
+        if leader:
+            # The load runs as its own task so a cancelled caller does not cancel it for the others
+            task = asyncio.ensure_future(load())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._finish(key, task))
+            self.loads += 1
+        else:
+            self.coalesced += 1
+        
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        self.max_waiters = max(self.max_waiters, self._waiters[key])
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+        
+        # Followers get their own copy, like cache hits do
+        return value if leader else copy.deepcopy(value)
+    
+    def _finish(self, key: tuple, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller went away before it was raised
+            task.exception()
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "waiters": sum(self._waiters.values()),
+            "max_waiters": self.max_waiters,
+            "loads": self.loads,
+            "coalesced": self.coalesced
+        }
+
+
+class DatabaseUnavailable(Exception):
+    """MongoDB did not answer in time, or the circuit breaker is open"""
+    
+    def __init__(self, message: str, retry_after: float = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fail fast while the database keeps failing, letting one probe through after a cool-down"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    # Errors meaning the database is unreachable or too slow, as opposed to rejecting one operation
+    FAILURES = (ConnectionFailure, ExecutionTimeout, asyncio.TimeoutError)
+    
+    def __init__(self, enabled: bool, failure_threshold: int, reset_timeout: float):
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.failures = 0
+        self.rejections = 0
+        self.trips = 0
+    
+    def retry_after(self) -> float:
+        if self.state == self.CLOSED:
+            return 0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+    
+    def _acquire(self) -> bool:
+        """Admit a call, returning whether it is the half-open probe; only one probe at a time goes through"""
+        if not self.enabled or self.state == self.CLOSED:
+            return False
+        if self.state == self.OPEN:
+            if self.retry_after() > 0:
+                self.rejections += 1
+                raise DatabaseUnavailable("Database circuit breaker is open", self.retry_after())
+            self.state = self.HALF_OPEN
+            logger.info("Database circuit breaker half-open, probing")
+        if self.probing:
+            self.rejections += 1
+            raise DatabaseUnavailable("Database circuit breaker is probing", self.reset_timeout)
+        self.probing = True
+        return True
+    
+    def _record_success(self):
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            self.state = self.CLOSED
+            logger.info("Database circuit breaker closed")
+    
+    def _record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+                logger.warning(f"Database circuit breaker open for {self.reset_timeout}s after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+    
+    async def call(self, operation: Callable[[], Awaitable], timeout: Optional[float] = DB_OPERATION_TIMEOUT) -> Any:
+        """Run one database round-trip under the breaker and a client-side deadline (None for no deadline)"""
+        probe = self._acquire()
+        try:
+            if timeout:
+                result = await asyncio.wait_for(operation(), timeout)
+            else:
+                result = await operation()
+        except self.FAILURES as e:
+            self._record_failure()
+            raise DatabaseUnavailable(f"Database unavailable: {str(e) or type(e).__name__}", self.retry_after()) from e
+        except PyMongoError:
+            # The server answered, so it is reachable
+            self._record_success()
+            raise
+        else:
+            self._record_success()
+            return result
+        finally:
+            if probe:
+                self.probing = False
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self.retry_after(), 3),
+            "failures": self.failures,
+            "rejections": self.rejections,
+            "trips": self.trips
+        }
+
+
+database_breaker = CircuitBreaker(
+    enabled=DB_BREAKER_ENABLED,
+    failure_threshold=DB_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=DB_BREAKER_RESET_TIMEOUT
+)
+
+
+# Query cache configuration, overridable per collection with DB_CACHE_TTL_<COLLECTION>
+DEFAULT_CACHE_TTLS = {
+    Collections.PROFILES: 3600,
+    Collections.EXPERIENCES: 3600,
+    Collections.SKILLS: 3600,
+    Collections.PROJECTS: 3600,
+    Collections.CERTIFICATIONS: 3600,
+    Collections.EDUCATION: 3600,
+    Collections.STATISTICS: 3600,
+    Collections.CONTACT_SUBMISSIONS: 0
+}
+
+query_cache = QueryCache(
+    enabled=os.environ.get('DB_CACHE_ENABLED', 'true').lower() == 'true',
+    max_entries=int(os.environ.get('DB_CACHE_MAX_ENTRIES', 1024)),
+    default_ttl=float(os.environ.get('DB_CACHE_DEFAULT_TTL', 300)),
+    ttls={
+        collection_name: float(os.environ.get(f"DB_CACHE_TTL_{collection_name.upper()}", ttl))
+        for collection_name, ttl in DEFAULT_CACHE_TTLS.items()
+    }
+)
+
+register_change_listener(query_cache.invalidate_collection)
+
+single_flight = SingleFlight(enabled=os.environ.get('DB_SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true')
+
+
+# Keys of a database command holding query values; they are logged with placeholders instead of the values
+SHAPED_COMMAND_KEYS = ("filter", "query", "update")
+
+def query_shape(value: Any) -> Any:
+    """A filter with its values replaced by placeholders, so the same query logs the same shape"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list) and any(isinstance(item, dict) for item in value):
+        return [query_shape(item) for item in value]
+    return "?"
+
+def command_shape(command: dict) -> dict:
+    return {
+        key: query_shape(value) if key in SHAPED_COMMAND_KEYS else value
+        for key, value in command.items()
+    }
+
+# Aggregation stages that write their output; explain with executionStats rejects them
+WRITE_STAGES = ("$merge", "$out")
+
+def explainable_command(command: dict) -> dict:
+    """A command explain("executionStats") accepts, with a final writing stage of an aggregation removed"""
+    pipeline = command.get("pipeline")
+    if pipeline and any(stage in pipeline[-1] for stage in WRITE_STAGES):
+        return {**command, "pipeline": pipeline[:-1]}
+    return command
+
+def plan_stages(plan: dict) -> list:
+    """Collect the stage names of a query plan tree, including slot-based engine plans"""
+    stages = []
+    if not isinstance(plan, dict):
+        return stages
+    
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for key in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+        stages.extend(plan_stages(plan.get(key)))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+def summarize_explain(explanation: dict) -> dict:
+    """Winning plan stages and execution counters of an explain("executionStats") result"""
+    # Aggregations nest the find part of their plan in a $cursor stage
+    for stage in explanation.get("stages", []):
+        if "$cursor" in stage:
+            explanation = stage["$cursor"]
+            break
+    
+    execution_stats = explanation.get("executionStats", {})
+    return {
+        "stages": plan_stages(explanation.get("queryPlanner", {}).get("winningPlan")),
+        "returned": execution_stats.get("nReturned"),
+        "keys_examined": execution_stats.get("totalKeysExamined"),
+        "documents_examined": execution_stats.get("totalDocsExamined"),
+        "execution_time_ms": execution_stats.get("executionTimeMillis")
+    }
+
+
+class SlowQueryLog:
+    """Log queries slower than a threshold, explaining a sample of them off the request path"""
+    
+    def __init__(self, enabled: bool, threshold_ms: float, explain_sample_rate: float, explain_interval: float, max_entries: int = 50):
+        self.enabled = enabled
+        self.threshold = threshold_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval = explain_interval
+        self.recent: deque = deque(maxlen=max_entries)
+        self._explained_at: Dict[str, float] = {}
+        self._explain_task: Optional[asyncio.Task] = None
+        self.slow_queries = 0
+        self.explains = 0
+        self.explains_skipped = 0
+        self.explain_failures = 0
+    
+    def is_slow(self, duration: float) -> bool:
+        return self.enabled and duration >= self.threshold
+    
+    def record(self, collection_name: str, command: dict, duration: float):
+        self.slow_queries += 1
+        shape = command_shape(command)
+        entry = {
+            "collection": collection_name,
+            "shape": shape,
+            "duration_ms": round(duration * 1000, 3),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "explain": None
+        }
+        self.recent.append(entry)
+        logger.warning(f"Slow query on {collection_name} took {entry['duration_ms']}ms: {shape}")
+        
+        if self._should_explain(repr((collection_name, shape))):
+            self._explain_task = asyncio.ensure_future(self._explain(collection_name, command, entry))
+        else:
+            self.explains_skipped += 1
+    
+    def _should_explain(self, shape_key: str) -> bool:
+        """Explain one query at a time, each shape at most once per interval, and never while the database is failing"""
+        if self.explain_sample_rate <= 0 or random.random() >= self.explain_sample_rate:
+            return False
+        if self._explain_task is not None and not self._explain_task.done():
+            return False
+        if database_breaker.state != CircuitBreaker.CLOSED:
+            return False
+        
+        now = time.monotonic()
+        explained_at = self._explained_at.get(shape_key)
+        if explained_at is not None and now - explained_at < self.explain_interval:
+            return False
+        self._explained_at[shape_key] = now
+        return True
+    
+    async def _explain(self, collection_name: str, command: dict, entry: dict):
+        try:
+            explanation = await asyncio.wait_for(
+                get_database().command({"explain": explainable_command(command), "verbosity": "executionStats"}),
+                DB_OPERATION_TIMEOUT
+            )
+            entry["explain"] = summarize_explain(explanation)
+            self.explains += 1
+            logger.warning(f"Slow query plan on {collection_name} for {entry['shape']}: {entry['explain']}")
+        except Exception as e:
+            self.explain_failures += 1
+            logger.error(f"Error explaining slow query on {collection_name}: {str(e) or type(e).__name__}")
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold * 1000,
+            "slow_queries": self.slow_queries,
+            "explains": self.explains,
+            "explains_skipped": self.explains_skipped,
+            "explain_failures": self.explain_failures,
+            "recent": list(self.recent)
+        }
+
+
+slow_query_log = SlowQueryLog(
+    enabled=DB_SLOW_QUERY_LOG_ENABLED,
+    threshold_ms=DB_SLOW_QUERY_MS,
+    explain_sample_rate=DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    explain_interval=DB_SLOW_QUERY_EXPLAIN_INTERVAL
+)
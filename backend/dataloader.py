@@ -0,0 +1,176 @@
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+
+from database import DatabaseService, register_change_listener
+
+
+def _projection_key(projection: Optional[dict]) -> Optional[tuple]:
+    return tuple(sorted(projection)) if projection else None
+
+
+def _merge_projections(projections: List[Optional[dict]], required_fields: List[str]) -> Optional[dict]:
+    """Smallest projection covering every caller, None when one of them wants whole documents"""
+    if any(not projection for projection in projections):
+        return None
+    merged = {field: 1 for projection in projections for field in projection}
+    for field in required_fields:
+        merged[field] = 1
+    return merged
+
+
+def _project(document: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return dict(document)
+    return {key: value for key, value in document.items() if key in projection or key == '_id'}
+
+
+class DataLoaderStats:
+    loads: int = 0
+    deduplicated: int = 0
+    batches: int = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {"loads": cls.loads, "deduplicated": cls.deduplicated, "batches": cls.batches}
+
+
+class DataLoader:
+    """Request-scoped reader that dedupes identical reads and coalesces same-collection reads into one $in query"""
+
+    def __init__(self):
+        self._futures: Dict[tuple, asyncio.Future] = {}
+        self._batches: Dict[tuple, List[tuple]] = {}
+        self._tasks = set()
+        self.active = True
+
+    def _load(self, key: tuple, batch_key: Optional[tuple], item: Any, fetch: Callable[..., Awaitable[None]]) -> asyncio.Future:
+        DataLoaderStats.loads += 1
+        future = self._futures.get(key)
+        if future is not None:
+            DataLoaderStats.deduplicated += 1
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = self._futures[key] = loop.create_future()
+
+        if batch_key is None:
+            # Paged reads are deduped but not coalesced
+            self._schedule(fetch, [(item, future)])
+            return future
+
+        batch = self._batches.get(batch_key)
+        if batch is None:
+            # Dispatch once everything queued during this event-loop tick has joined the batch
+            batch = self._batches[batch_key] = []
+            loop.call_soon(self._dispatch, batch_key, fetch)
+        batch.append((item, future))
+        return future
+
+    def _dispatch(self, batch_key: tuple, fetch: Callable[..., Awaitable[None]]):
+        self._schedule(fetch, self._batches.pop(batch_key))
+
+    def _schedule(self, fetch: Callable[..., Awaitable[None]], batch: List[tuple]):
+        DataLoaderStats.batches += 1
+
+        async def run():
+            try:
+                await fetch(batch)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def clear_collection(self, collection_name: str):
+        """Forget memoized reads of a collection, so reads after a write see it"""
+        for key in [key for key in self._futures if key[1] == collection_name]:
+            del self._futures[key]
+
+    async def get_document_by_id(self, collection_name: str, document_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        """Same contract as DatabaseService.get_document_by_id"""
+        async def fetch(batch: List[tuple]):
+            document_ids = sorted({item[0] for item, _ in batch})
+            merged = _merge_projections([item[1] for item, _ in batch], [])
+            documents = await DatabaseService.get_documents_by_ids(collection_name, document_ids, merged)
+            found = {str(document['_id']): document for document in documents}
+            for (item_id, _), future in batch:
+                future.set_result(found.get(item_id))
+
+        key = ("by_id", collection_name, document_id, _projection_key(projection))
+        document = await self._load(key, ("by_id", collection_name), (document_id, projection), fetch)
+        return _project(document, projection) if document is not None else None
+
+    async def get_documents_by_profile_id(self, collection_name: str, profile_id: str, sort_field: str = "order", projection: Optional[dict] = None, limit: Optional[int] = None, after: Optional[tuple] = None) -> List[dict]:
+        """Same contract as DatabaseService.get_documents_by_profile_id"""
+        key = ("by_profile", collection_name, profile_id, sort_field, _projection_key(projection), limit, after)
+
+        if limit or after:
+            async def fetch_page(batch: List[tuple]):
+                documents = await DatabaseService.get_documents_by_profile_id(
+                    collection_name, profile_id, sort_field, projection=projection, limit=limit, after=after
+                )
+                batch[0][1].set_result(documents)
+
+            documents = await self._load(key, None, None, fetch_page)
+            return [dict(document) for document in documents]
+
+        async def fetch(batch: List[tuple]):
+            profile_ids = sorted({item[0] for item, _ in batch})
+            merged = _merge_projections([item[1] for item, _ in batch], ["profile_id", sort_field])
+            documents = await DatabaseService.get_documents_by_profile_ids(collection_name, profile_ids, sort_field, merged)
+            grouped = {profile_id: [] for profile_id in profile_ids}
+            for document in documents:
+                grouped.setdefault(str(document.get('profile_id')), []).append(document)
+            for (item_profile_id, _), future in batch:
+                future.set_result(grouped.get(item_profile_id, []))
+
+        documents = await self._load(key, ("by_profile", collection_name, sort_field), (profile_id, projection), fetch)
+        return [_project(document, projection) for document in documents]
+
+
+_current_loader: ContextVar[Optional[DataLoader]] = ContextVar("dataloader", default=None)
+
+
+def current_loader() -> Optional[DataLoader]:
+    """The loader of the request being handled, None outside of a request"""
+    loader = _current_loader.get()
+    # Background tasks inherit the context of the request that spawned them and may outlive it
+    return loader if loader is not None and loader.active else None
+
+
+def get_reader():
+    """Read through the request's loader when there is one, otherwise straight through DatabaseService"""
+    return current_loader() or DatabaseService
+
+
+class DataLoaderMiddleware:
+    """Give every HTTP request its own DataLoader"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        loader = DataLoader()
+        token = _current_loader.set(loader)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loader.active = False
+            _current_loader.reset(token)
+
+
+def _clear_current_loader(collection_name: str):
+    loader = current_loader()
+    if loader:
+        loader.clear_collection(collection_name)
+
+
+register_change_listener(_clear_current_loader)
@@ -0,0 +1,66 @@
+from typing import Optional
+import asyncio
+import logging
+import os
+import time
+
+from database import Database, DatabaseUnavailable, database_breaker
+
+logger = logging.getLogger(__name__)
+
+# Readiness pings are reused for this many seconds, so probe frequency does not become database load
+HEALTH_CHECK_CACHE_TTL = float(os.environ.get('HEALTH_CHECK_CACHE_TTL', 5))
+HEALTH_PING_TIMEOUT = float(os.environ.get('HEALTH_PING_TIMEOUT_MS', 500)) / 1000
+
+
+class DatabaseHealth:
+    """Cached result of the last MongoDB ping"""
+    connected: bool = False
+    error: Optional[str] = None
+    latency_ms: Optional[float] = None
+    checked_at: float = 0.0
+    _task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def age(cls) -> float:
+        return time.monotonic() - cls.checked_at
+
+    @classmethod
+    async def check(cls) -> bool:
+        """Whether MongoDB answered a ping recently, pinging at most once per cache TTL"""
+        if cls.checked_at and cls.age() < HEALTH_CHECK_CACHE_TTL:
+            return cls.connected
+
+        # Concurrent probes share one ping
+        if cls._task is None or cls._task.done():
+            cls._task = asyncio.ensure_future(cls._ping())
+        await asyncio.shield(cls._task)
+        return cls.connected
+
+    @classmethod
+    async def _ping(cls):
+        started = time.perf_counter()
+        try:
+            if Database.client is None:
+                raise DatabaseUnavailable("Not connected to MongoDB")
+            await database_breaker.call(lambda: Database.client.admin.command("ping"), timeout=HEALTH_PING_TIMEOUT)
+            cls.connected = True
+            cls.error = None
+            cls.latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        except Exception as e:
+            if cls.connected:
+                logger.warning(f"MongoDB health check failed: {e}")
+            cls.connected = False
+            cls.error = str(e)
+            cls.latency_ms = None
+        finally:
+            cls.checked_at = time.monotonic()
+
+    @classmethod
+    def describe(cls) -> dict:
+        return {
+            "connected": cls.connected,
+            "error": cls.error,
+            "latency_ms": cls.latency_ms,
+            "checked_seconds_ago": round(cls.age(), 3) if cls.checked_at else None
+        }
@@ -0,0 +1,106 @@
+from bson import ObjectId
+from typing import Any, List, Optional
+import logging
+
+from database import DatabaseService, Collections, publish_collection_change, register_write_hook
+from dataloader import get_reader
+
+logger = logging.getLogger(__name__)
+
+
+class DerivedMetric:
+    """A per-profile value computed from a child collection and materialized into the statistics document"""
+
+    def __init__(self, name: str, source_collection: str, pipeline: List[dict], default: Any = 0):
+        # The sub-pipeline runs over the profile's documents and must emit a single `value` field
+        self.name = name
+        self.source_collection = source_collection
+        self.pipeline = pipeline
+        self.default = default
+
+    def lookup_stage(self) -> dict:
+        return {
+            "$lookup": {
+                "from": self.source_collection,
+                "let": {"profile_id": "$_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$profile_id", "$$profile_id"]}}},
+                    *self.pipeline
+                ],
+                "as": self.name
+            }
+        }
+
+    def value_expression(self) -> dict:
+        return {"$ifNull": [{"$arrayElemAt": [f"${self.name}.value", 0]}, self.default]}
+
+
+# Metrics kept in each profile's statistics document, add new derived metrics here
+STATISTICS_METRICS = [
+    DerivedMetric("project_count", Collections.PROJECTS, [
+        {"$count": "value"}
+    ]),
+    DerivedMetric("skill_category_count", Collections.SKILLS, [
+        {"$group": {"_id": "$category"}},
+        {"$count": "value"}
+    ])
+]
+
+STATISTICS_SOURCE_COLLECTIONS = {metric.source_collection for metric in STATISTICS_METRICS}
+
+
+def statistics_pipeline(profile_ids: Optional[List[ObjectId]] = None) -> List[dict]:
+    """Compute every metric for the given profiles (all when None) and merge them into statistics"""
+    pipeline = []
+    if profile_ids is not None:
+        pipeline.append({"$match": {"_id": {"$in": profile_ids}}})
+
+    pipeline.extend(metric.lookup_stage() for metric in STATISTICS_METRICS)
+    pipeline.append({
+        "$project": {
+            "_id": 1,
+            "profile_id": "$_id",
+            "updated_at": "$$NOW",
+            **{metric.name: metric.value_expression() for metric in STATISTICS_METRICS}
+        }
+    })
+    pipeline.append({
+        "$merge": {
+            "into": Collections.STATISTICS,
+            "on": "_id",
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }
+    })
+    return pipeline
+
+
+async def refresh_statistics(profile_ids: Optional[List[ObjectId]] = None):
+    """Recompute the materialized statistics of the given profiles (all when None)"""
+    try:
+        await DatabaseService.aggregate(Collections.PROFILES, statistics_pipeline(profile_ids))
+        await publish_collection_change(Collections.STATISTICS)
+    except Exception as e:
+        logger.error(f"Error refreshing statistics: {e}")
+        raise
+
+
+async def refresh_statistics_for_write(collection_name: str, profile_ids: Optional[List[ObjectId]]):
+    """Write hook keeping statistics current for the profiles a write touched"""
+    if collection_name not in STATISTICS_SOURCE_COLLECTIONS:
+        return
+    if profile_ids is not None and not profile_ids:
+        return
+    await refresh_statistics(profile_ids)
+
+
+async def get_profile_statistics(profile_id: str) -> dict:
+    """Point read of a profile's materialized statistics, materializing them on first use"""
+    statistics = await get_reader().get_document_by_id(Collections.STATISTICS, profile_id)
+    if statistics is None:
+        await refresh_statistics([ObjectId(profile_id)])
+        statistics = await get_reader().get_document_by_id(Collections.STATISTICS, profile_id)
+    return statistics or {}
+
+
+register_write_hook(refresh_statistics_for_write)
@@ -0,0 +1,236 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import functools
+import inspect
+import os
+import time
+
+# Metrics are only updated from the event loop thread, so plain integer updates need no locking
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+# Latency bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram; bucket counters are allocated once, observing is a bisect and two additions"""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: Dict[str, str]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for upper_bound, count in zip((*self.buckets, float("inf")), self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(upper_bound)})} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {self.sum!r}")
+        lines.append(f"{name}_count{_format_labels(labels)} {self.count}")
+        return lines
+
+
+class MetricFamily:
+    """A named metric with one child per label combination"""
+
+    def __init__(self, name: str, kind: str, help_text: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.children: Dict[tuple, object] = {}
+
+    def labels(self, *values) -> Histogram:
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = Histogram(self.buckets)
+        return child
+
+    def inc(self, *values, amount: float = 1):
+        self.children[values] = self.children.get(values, 0) + amount
+
+    def set(self, *values, value: float):
+        self.children[values] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self.children.items():
+            labels = dict(zip(self.label_names, values))
+            if isinstance(child, Histogram):
+                lines.extend(child.samples(self.name, labels))
+            else:
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(child)}")
+        return lines
+
+
+# A collector returns (name, kind, help, labels, value) samples for state owned by other modules
+Collector = Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.families: List[MetricFamily] = []
+        self.collectors: List[Collector] = []
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> MetricFamily:
+        return self._register(MetricFamily(name, "histogram", help_text, label_names, buckets))
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, "counter", help_text, label_names))
+
+    def gauge(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, "gauge", help_text, label_names))
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        self.families.append(family)
+        return family
+
+    def register_collector(self, collector: Collector):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        for family in self.families:
+            lines.extend(family.render())
+
+        collected: Dict[str, MetricFamily] = {}
+        for collector in self.collectors:
+            for name, kind, help_text, labels, value in collector():
+                family = collected.get(name)
+                if family is None:
+                    family = collected[name] = MetricFamily(name, kind, help_text, tuple(labels))
+                family.set(*labels.values(), value=value)
+        for family in collected.values():
+            lines.extend(family.render())
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+REQUESTS_TOTAL = registry.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests currently being handled")
+DB_OPERATION_DURATION = registry.histogram("db_operation_duration_seconds", "DatabaseService operation latency", ("collection", "operation"))
+DB_DOCUMENTS_RETURNED = registry.counter("db_documents_returned_total", "Documents returned by DatabaseService operations", ("collection", "operation"))
+DB_OPERATION_ERRORS = registry.counter("db_operation_errors_total", "DatabaseService operations that raised", ("collection", "operation"))
+
+REQUESTS_IN_FLIGHT.set(value=0)
+
+
+def _document_count(result) -> int:
+    if isinstance(result, list):
+        return len(result)
+    return 1 if isinstance(result, dict) else 0
+
+
+def _record_operation(collection_name: str, operation: str, started: float, documents: int, failed: bool):
+    DB_OPERATION_DURATION.labels(collection_name, operation).observe(time.perf_counter() - started)
+    if documents:
+        DB_DOCUMENTS_RETURNED.inc(collection_name, operation, amount=documents)
+    if failed:
+        DB_OPERATION_ERRORS.inc(collection_name, operation)
+
+
+def instrumented(func):
+    """Time a DatabaseService method per collection and operation, counting the documents it returns"""
+    if not METRICS_ENABLED:
+        return func
+
+    operation = func.__name__
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def stream_wrapper(collection_name: str, *args, **kwargs):
+            started = time.perf_counter()
+            documents = 0
+            failed = False
+            try:
+                async for document in func(collection_name, *args, **kwargs):
+                    documents += 1
+                    yield document
+            except Exception:
+                failed = True
+                raise
+            finally:
+                _record_operation(collection_name, operation, started, documents, failed)
+        return stream_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(collection_name: str, *args, **kwargs):
+        started = time.perf_counter()
+        result = None
+        failed = False
+        try:
+            result = await func(collection_name, *args, **kwargs)
+            return result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            _record_operation(collection_name, operation, started, _document_count(result), failed)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """Record latency, status and concurrency of every HTTP request"""
+
+    def __init__(self, app, route_paths: Callable[[], Iterable[str]]):
+        # Unknown paths share one label so scanners cannot blow up the label set
+        self.app = app
+        self.route_paths = route_paths
+        self._known_paths: Optional[set] = None
+
+    async def __call__(self, scope, receive, send):
+        if not METRICS_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._known_paths is None:
+            self._known_paths = set(self.route_paths())
+        route = scope["path"] if scope["path"] in self._known_paths else "unmatched"
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc(amount=1)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.inc(amount=-1)
+            REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - started)
+            REQUESTS_TOTAL.inc(method, route, str(status))
@@ -244,4 +244,16 @@ class EducationCreate(BaseModel):
     start_date: str
     end_date: str
     location: str
-    order: int = 0
\ No newline at end of file
+    order: int = 0
+
+
+# Batch Models
+class BatchSectionOptions(BaseModel):
+    fields: Optional[List[str]] = None
+    limit: Optional[int] = Field(None, ge=1, le=100)
+    after: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    sections: List[str] = Field(..., min_length=1)
+    options: Dict[str, BatchSectionOptions] = Field(default_factory=dict)
@@ -0,0 +1,167 @@
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+import asyncio
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Requests carrying PROFILING_TOKEN in the X-Profile-Token header are profiled; unset, profiling is off
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')
+PROFILING_HEADER = b"x-profile-token"
+PROFILING_INTERVAL = float(os.environ.get('PROFILING_INTERVAL_MS', 2)) / 1000
+PROFILING_OUTPUT_DIR = Path(os.environ.get('PROFILING_OUTPUT_DIR', '/tmp/portfolio-profiles'))
+PROFILING_MAX_REPORTS = int(os.environ.get('PROFILING_MAX_REPORTS', 50))
+
+MAX_STACK_DEPTH = 128
+REPORT_SUFFIX = ".collapsed"
+REPORT_ID_PATTERN = re.compile(r"^[\w.-]+\.collapsed$")
+DRIVER_PATH = f"{os.sep}pymongo{os.sep}"
+REPORTS_PATH = "/api/debug/profiles/"
+
+
+def authorized(token: Optional[str]) -> bool:
+    """Whether a request token matches PROFILING_TOKEN, compared in constant time"""
+    return bool(PROFILING_TOKEN) and bool(token) and hmac.compare_digest(token, PROFILING_TOKEN)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame) -> str:
+    """A frame's call stack, outermost first, in the collapsed format flamegraph tools read"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _runs_driver_code(frame) -> bool:
+    while frame is not None:
+        if DRIVER_PATH in frame.f_code.co_filename:
+            return True
+        frame = frame.f_back
+    return False
+
+
+class StackSampler:
+    """Sample the event loop thread's stack, and the driver threads while they run pymongo code, from a background thread"""
+
+    def __init__(self, loop_thread_id: int, interval: float):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        # The sampler needs the GIL at least once per interval to see the event loop thread mid-request
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        own_thread_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread_id:
+                    continue
+                stack = collapse_stack(frame)
+                if thread_id == self.loop_thread_id:
+                    self.samples["event-loop;" + stack] += 1
+                elif _runs_driver_code(frame):
+                    # Motor runs driver calls on executor threads; idle executor threads are left out
+                    self.samples["driver;" + stack] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+# Helper functions storing reports as files named by their report id
+def _write_report(report_id: str, report: str):
+    PROFILING_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    (PROFILING_OUTPUT_DIR / report_id).write_text(report)
+
+    reports = sorted(PROFILING_OUTPUT_DIR.glob(f"*{REPORT_SUFFIX}"), key=lambda path: path.stat().st_mtime)
+    for path in reports[:-PROFILING_MAX_REPORTS]:
+        path.unlink(missing_ok=True)
+
+
+def read_report(report_id: str) -> Optional[str]:
+    if not REPORT_ID_PATTERN.match(report_id):
+        return None
+    path = PROFILING_OUTPUT_DIR / report_id
+    return path.read_text() if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """Profile a single request when it carries the profiling token, storing collapsed stacks for flamegraph tools"""
+
+    # One profile at a time: samples are taken per thread, so concurrent profiles would share them
+    _busy = False
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Without a configured token, or without the header, requests pass straight through; so do report downloads
+        if not PROFILING_TOKEN or scope["type"] != "http" or scope["path"].startswith(REPORTS_PATH):
+            await self.app(scope, receive, send)
+            return
+
+        token = next((value for name, value in scope["headers"] if name == PROFILING_HEADER), None)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not authorized(token.decode("latin-1")):
+            logger.warning(f"Rejected profiling token for {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+
+        if ProfilingMiddleware._busy:
+            await self.app(scope, receive, self._with_header(send, b"busy"))
+            return
+
+        slug = re.sub(r"[^\w]+", "-", scope["path"]).strip("-") or "root"
+        report_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method'].lower()}-{slug}-{uuid.uuid4().hex[:8]}{REPORT_SUFFIX}"
+        sampler = StackSampler(threading.get_ident(), PROFILING_INTERVAL)
+
+        ProfilingMiddleware._busy = True
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            # Inner middleware see the report id, the response cache lets the request through to its handler
+            await self.app({**scope, "profiling": report_id}, receive, self._with_header(send, report_id.encode()))
+        finally:
+            sampler.stop()
+            ProfilingMiddleware._busy = False
+            duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, _write_report, report_id, sampler.collapsed())
+                logger.info(f"Profiled {scope['method']} {scope['path']} in {duration_ms}ms, {sum(sampler.samples.values())} samples: {report_id}")
+            except Exception as e:
+                logger.error(f"Error storing profile report {report_id}: {e}")
+
+    @staticmethod
+    def _with_header(send, report_id: bytes):
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-report", report_id)]}
+            await send(message)
+        return send_with_header
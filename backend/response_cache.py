@@ -0,0 +1,471 @@
+from collections import OrderedDict
+from starlette.datastructures import Headers
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import time
+import zlib
+
+from database import register_change_listener
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Response cache configuration
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256))
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+
+# Until this hard TTL, entries past RESPONSE_CACHE_TTL are still served while a background task refreshes them
+RESPONSE_CACHE_HARD_TTL = float(os.environ.get('RESPONSE_CACHE_HARD_TTL', 900))
+
+# Sent to clients and CDNs so they revalidate with the ETag on every use; the TTLs above only drive server-side refreshes,
+# so writes reach clients as soon as they invalidate the cached body
+RESPONSE_CACHE_CONTROL = os.environ.get('RESPONSE_CACHE_CONTROL', 'no-cache').encode()
+
+# Bodies smaller than this are always sent uncompressed
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024))
+
+# Compression levels; every write re-renders the cached bodies, so mid levels keep recompression cheap
+RESPONSE_BROTLI_QUALITY = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 5))
+RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+
+# Compressors by content coding, in server preference order; run off the event loop, once per cached body
+COMPRESSORS = {
+    **({"br": lambda body: brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)} if brotli else {}),
+    "gzip": lambda body: gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+}
+
+# Incremental compressors for streamed bodies, flushed after every chunk so clients still see each line as it is sent
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=RESPONSE_BROTLI_QUALITY)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+STREAM_COMPRESSORS = {
+    **({"br": _BrotliStream} if brotli else {}),
+    "gzip": _GzipStream
+}
+
+# Set on last-known-good bodies served because the app could not render a fresh one
+DEGRADED_HEADER = (b"x-degraded", b"last-known-good")
+
+# Headers recomputed for every cached response instead of being stored
+_DROPPED_HEADERS = {b"content-length", b"etag", b"content-encoding", b"vary", b"cache-control"}
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the content coding to send for an Accept-Encoding header, None for identity"""
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    preferences = list(COMPRESSORS)
+    candidates = [
+        (weights.get(coding, weights.get("*", 0.0)), -preferences.index(coding), coding)
+        for coding in preferences
+    ]
+    weight, _, coding = max(candidates)
+    return coding if weight > 0 else None
+
+
+class CachedResponse:
+    """Final encoded body bytes of a response, with their strong ETag"""
+
+    def __init__(self, body: bytes, headers: List[tuple], collections: List[str], ttl: float, hard_ttl: float):
+        now = time.monotonic()
+        self.body = body
+        self.headers = [(name, value) for name, value in headers if name.lower() not in _DROPPED_HEADERS]
+        self.collections = collections
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.fresh_until = now + ttl
+        self.expires_at = now + max(hard_ttl, ttl)
+        self.variants: Dict[str, bytes] = {}
+        self._compressions: Dict[str, asyncio.Future] = {}
+
+    def encoding_for(self, encoding: Optional[str]) -> Optional[str]:
+        """The content coding actually sent, None for bodies too small to compress"""
+        if encoding is None or len(self.body) < RESPONSE_COMPRESSION_MIN_SIZE:
+            return None
+        return encoding
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return self.variant_etag(encoding) if encoding else self.etag
+
+    async def variant(self, encoding: Optional[str]) -> bytes:
+        """The body in a content coding, compressed on first use in the default executor"""
+        if encoding is None:
+            return self.body
+
+        body = self.variants.get(encoding)
+        if body is None:
+            # Concurrent first requests share one compression
+            compression = self._compressions.get(encoding)
+            if compression is None:
+                compression = asyncio.get_running_loop().run_in_executor(None, COMPRESSORS[encoding], self.body)
+                self._compressions[encoding] = compression
+            try:
+                body = self.variants[encoding] = await asyncio.shield(compression)
+            finally:
+                if compression.done():
+                    self._compressions.pop(encoding, None)
+        return body
+
+    def variant_etag(self, encoding: str) -> str:
+        # Each representation gets its own strong validator
+        return self.etag[:-1] + "-" + encoding + '"'
+
+    def is_fresh(self) -> bool:
+        return self.fresh_until > time.monotonic()
+
+    def is_expired(self) -> bool:
+        return self.expires_at <= time.monotonic()
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Strong comparison against an If-None-Match header, weak validators included"""
+        if not if_none_match:
+            return False
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        known_etags = {self.etag, *(self.variant_etag(encoding) for encoding in COMPRESSORS)}
+        return "*" in candidates or any(tag in known_etags for tag in candidates)
+
+
+class ResponseCache:
+    """Bounded LRU cache of encoded responses, invalidated by collection"""
+
+    def __init__(self, enabled: bool, max_entries: int, ttl: float, hard_ttl: float):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hard_ttl = hard_ttl
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        # Last successful body per route and query, kept across invalidations as a fallback for outages
+        self._last_known_good: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self.refreshing = set()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.degraded = 0
+
+    def generations(self, collections: List[str]) -> tuple:
+        return tuple(self._generations.get(collection_name, 0) for collection_name in collections)
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        """Return the entry for a key until its hard TTL; callers revalidate entries that are no longer fresh"""
+        entry = self._entries.get(key)
+        if entry is not None and not entry.is_expired():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if not entry.is_fresh():
+                self.stale_hits += 1
+            return entry
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: tuple, body: bytes, headers: List[tuple], collections: List[str], generations: tuple) -> CachedResponse:
+        entry = CachedResponse(body, headers, collections, self.ttl, self.hard_ttl)
+
+        # Do not keep bodies rendered while one of their collections was being written to
+        if generations == self.generations(collections):
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def remember(self, key: tuple, entry: CachedResponse):
+        self._last_known_good[key] = entry
+        self._last_known_good.move_to_end(key)
+        while len(self._last_known_good) > self.max_entries:
+            self._last_known_good.popitem(last=False)
+
+    def last_known_good(self, key: tuple) -> Optional[CachedResponse]:
+        return self._last_known_good.get(key)
+
+    def invalidate_collection(self, collection_name: str):
+        self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+        stale_keys = [key for key, entry in self._entries.items() if collection_name in entry.collections]
+        for key in stale_keys:
+            del self._entries[key]
+        if stale_keys:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stale_hits": self.stale_hits,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "refreshing": len(self.refreshing),
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "last_known_good": len(self._last_known_good),
+            "degraded": self.degraded
+        }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL, RESPONSE_CACHE_HARD_TTL)
+
+register_change_listener(response_cache.invalidate_collection)
+
+
+class ResponseCacheMiddleware:
+    """Serve GETs of the given routes from cached body bytes, answering If-None-Match with 304 and revalidating stale bodies in the background"""
+
+    def __init__(self, app, routes: Dict[str, List[str]], cache: ResponseCache = response_cache, version_key: Callable[[], Any] = None):
+        # routes maps each cacheable path to the collections its response is built from
+        self.app = app
+        self.routes = routes
+        self.cache = cache
+        self.version_key = version_key or (lambda: None)
+        self._refresh_tasks = set()
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not self.cache.enabled
+            or scope["type"] != "http"
+            or scope["method"] != "GET"
+            or scope["path"] not in self.routes
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        # Streams are not cached, and profiled requests run the handler they were sent to profile
+        if "application/x-ndjson" in request_headers.get("accept", "") or scope.get("profiling"):
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope["query_string"], self.version_key())
+        entry = self.cache.get(key)
+        if entry is None:
+            collections = self.routes[scope["path"]]
+            generations = self.cache.generations(collections)
+            response = await self._render(scope, receive)
+            if response is None:
+                return
+
+            entry = self._store(key, collections, generations, response)
+            if entry is None:
+                fallback = self.cache.last_known_good(key[:2]) if response[0] == 503 else None
+                if fallback is not None:
+                    # The database is unavailable, answer with the last body rendered for this request
+                    self.cache.degraded += 1
+                    await self._send_entry(fallback, request_headers, send, degraded=True)
+                    return
+                for message in response[3]:
+                    await send(message)
+                return
+        elif not entry.is_fresh():
+            # Serve the stale body now and refresh it in the background
+            self._revalidate(key, scope)
+
+        await self._send_entry(entry, request_headers, send)
+
+    def _store(self, key: tuple, collections: List[str], generations: tuple, response: tuple) -> Optional[CachedResponse]:
+        """Cache a rendered response, None when it is not a cacheable 200 JSON response"""
+        status, headers, body, _ = response
+        if status != 200 or not Headers(raw=headers).get("content-type", "").startswith("application/json"):
+            return None
+        entry = self.cache.set(key, body, headers, collections, generations)
+        self.cache.remember(key[:2], entry)
+        return entry
+
+    def _revalidate(self, key: tuple, scope):
+        if key in self.cache.refreshing:
+            return
+        self.cache.refreshing.add(key)
+
+        task = asyncio.ensure_future(self._refresh(key, scope))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh(self, key: tuple, scope):
+        """Re-render a stale entry without client conditionals, keeping the stale body if that fails"""
+        refresh_scope = dict(scope)
+        refresh_scope["headers"] = [(name, value) for name, value in scope["headers"] if name.lower() != b"if-none-match"]
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        try:
+            collections = self.routes[scope["path"]]
+            generations = self.cache.generations(collections)
+            response = await self._render(refresh_scope, receive)
+            if response is None or self._store(key, collections, generations, response) is None:
+                raise RuntimeError(f"status {response[0] if response else 'unknown'}")
+            self.cache.refreshes += 1
+        except Exception as e:
+            self.cache.refresh_failures += 1
+            logger.error(f"Error refreshing cached response for {scope['path']}: {e}")
+        finally:
+            self.cache.refreshing.discard(key)
+
+    async def _render(self, scope, receive) -> Optional[tuple]:
+        """Run the downstream app and capture its response instead of sending it"""
+        messages = []
+        body_parts = []
+        start = {}
+
+        async def capture(message):
+            messages.append(message)
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        if not start:
+            return None
+        return start["status"], list(start.get("headers", [])), b"".join(body_parts), messages
+
+    async def _send_entry(self, entry: CachedResponse, request_headers: Headers, send, degraded: bool = False):
+        encoding = entry.encoding_for(negotiate_encoding(request_headers.get("accept-encoding")))
+        etag = entry.etag_for(encoding)
+        headers = [
+            (b"etag", etag.encode()),
+            (b"vary", b"Accept-Encoding"),
+            (b"cache-control", b"no-cache" if degraded else RESPONSE_CACHE_CONTROL)
+        ]
+        if degraded:
+            headers.append(DEGRADED_HEADER)
+
+        if entry.matches(request_headers.get("if-none-match")):
+            self.cache.not_modified += 1
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": headers
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        body = await entry.variant(encoding)
+        if encoding:
+            headers.append((b"content-encoding", encoding.encode()))
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": entry.headers + headers + [(b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class CompressionMiddleware:
+    """Compress responses the response cache did not already encode, negotiated on Accept-Encoding"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        stream = None
+
+        async def send_compressed(message):
+            nonlocal start, stream
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                # Cached responses arrive already encoded; 204/304 have no body to compress
+                if "content-encoding" in headers or message["status"] in (204, 304) or scope["method"] == "HEAD":
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if stream is None and not message.get("more_body"):
+                # Whole body in one message: compress it off the event loop when it is large enough
+                headers = start.get("headers", [])
+                if len(body) >= RESPONSE_COMPRESSION_MIN_SIZE:
+                    body = await asyncio.get_running_loop().run_in_executor(None, COMPRESSORS[encoding], body)
+                    headers = self._encoded_headers(headers, encoding) + [(b"content-length", str(len(body)).encode())]
+                await send({**start, "headers": headers})
+                start = None
+                await send({**message, "body": body})
+                return
+
+            if stream is None:
+                # Streamed body of unknown length
+                stream = STREAM_COMPRESSORS[encoding]()
+                await send({**start, "headers": self._encoded_headers(start.get("headers", []), encoding)})
+            chunk = stream.compress(body) if body else b""
+            if not message.get("more_body"):
+                chunk += stream.finish()
+            await send({**message, "body": chunk})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _encoded_headers(headers: List[tuple], encoding: str) -> List[tuple]:
+        encoded = [(name, value) for name, value in headers if name.lower() not in (b"content-length", b"etag")]
+        vary = [value for name, value in headers if name.lower() == b"vary"]
+        if not vary:
+            encoded.append((b"vary", b"Accept-Encoding"))
+        elif b"accept-encoding" not in vary[0].lower():
+            encoded = [(name, value + b", Accept-Encoding" if name.lower() == b"vary" else value) for name, value in encoded]
+        encoded.append((b"content-encoding", encoding.encode()))
+        return encoded
@@ -0,0 +1,67 @@
+from bson import ObjectId
+from datetime import date, datetime
+from fastapi.responses import JSONResponse
+from typing import Any, Iterable, List
+import json
+
+from tracing import span
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library encoder is the fallback
+    orjson = None
+
+
+def serialize_value(value: Any) -> Any:
+    """Convert BSON types nested anywhere in a value to their JSON representation"""
+    if isinstance(value, dict):
+        return {key: serialize_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [serialize_value(item) for item in value]
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def serialize_document(document: dict) -> dict:
+    """Convert a MongoDB document in a single pass, exposing `_id` as `id`"""
+    serialized = {}
+    for key, value in document.items():
+        if key == '_id':
+            serialized['id'] = str(value)
+        elif isinstance(value, (str, int, float, bool)) or value is None:
+            serialized[key] = value
+        else:
+            serialized[key] = serialize_value(value)
+    return serialized
+
+
+def serialize_documents(documents: Iterable[dict]) -> List[dict]:
+    return [serialize_document(document) for document in documents]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content straight to JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class PortfolioJSONResponse(JSONResponse):
+    """JSON response encoded directly to bytes, skipping FastAPI's generic jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        with span("response.encode") as current:
+            body = dumps(content)
+            current.set("bytes", len(body))
+        return body
@@ -1,22 +1,42 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Depends, Request, Header
+from fastapi.responses import Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Optional, Dict, Any
+from bson import ObjectId
+from typing import List, Optional, Dict, Any, AsyncIterator
+import asyncio
+import base64
+import hmac
+import json
+import math
 import os
+import time
 import logging
 from pathlib import Path
 
-# Import our models and database services
-from models import *
-from database import DatabaseService, Collections, connect_to_mongo, close_mongo_connection
-
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Import our models and database services (after .env is loaded, as they read settings at import time)
+from models import *
+from database import DatabaseService, DatabaseUnavailable, Collections, ActiveProfile, query_cache, single_flight, database_breaker, slow_query_log, connect_to_mongo, close_mongo_connection, warm_up_connection_pool, connection_pool_stats, start_index_builder, stop_index_builder, drain_write_tasks, IndexBuilder, PROFILE_CHILD_COLLECTIONS
+from change_watcher import ChangeWatcher, start_change_watcher, stop_change_watcher
+from materialized import get_profile_statistics
+from snapshot import current_snapshot, rebuild_snapshot, start_snapshot, stop_snapshot
+from response_cache import CompressionMiddleware, ResponseCacheMiddleware, response_cache
+from dataloader import DataLoaderMiddleware, DataLoaderStats, get_reader
+from health import DatabaseHealth
+from profiling import PROFILING_TOKEN, ProfilingMiddleware, authorized as profiling_authorized, read_report as read_profile_report
+from tracing import TracingMiddleware, span, trace_exporter
+from metrics import MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, registry as metrics_registry
+from serialization import PortfolioJSONResponse, dumps, serialize_document, serialize_documents
+
+# Monotonic start time, reported as uptime by the diagnostics endpoint
+STARTED_AT = time.monotonic()
+
 # Create the main app without a prefix
-app = FastAPI(title="Lay Been Tan Portfolio API", version="1.0.0")
+app = FastAPI(title="Lay Been Tan Portfolio API", version="1.0.0", default_response_class=PortfolioJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -32,201 +52,518 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    await warm_up_connection_pool()
+    await start_index_builder()
+    await start_change_watcher()
+    await start_snapshot()
     logger.info("Portfolio API started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await stop_snapshot()
+    await stop_change_watcher()
+    await stop_index_builder()
+    await drain_write_tasks()
     await close_mongo_connection()
+    trace_exporter.stop()
     logger.info("Portfolio API shutdown complete")
 
-# Helper function to create API responses
-def create_response(success: bool, data: Any = None, message: str = None, error: str = None) -> dict:
-    return {
+# Helper function to create API responses, encoded straight to JSON bytes
+def create_response(success: bool, data: Any = None, message: str = None, error: str = None, **extra) -> PortfolioJSONResponse:
+    return PortfolioJSONResponse({
         "success": success,
         "data": data,
         "message": message,
-        "error": error
+        "error": error,
+        **extra
+    })
+
+# Answer with 503 instead of waiting on the database while it is unavailable
+@app.exception_handler(DatabaseUnavailable)
+async def database_unavailable_handler(request: Request, exc: DatabaseUnavailable):
+    logger.warning(f"Database unavailable for {request.url.path}: {exc}")
+    response = create_response(False, None, None, "Database temporarily unavailable")
+    response.status_code = 503
+    response.headers["Retry-After"] = str(max(1, math.ceil(exc.retry_after)))
+    return response
+
+# Helper functions to stream list endpoints as newline-delimited JSON
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+async def ndjson_response(documents: AsyncIterator[dict]) -> StreamingResponse:
+    # The first batch is read before the 200 is sent, so an open breaker or a failing query still gets its error response
+    iterator = documents.__aiter__()
+    try:
+        first_documents = [await iterator.__anext__()]
+    except StopAsyncIteration:
+        first_documents = []
+    
+    async def encode_documents():
+        for document in first_documents:
+            yield dumps(serialize_document(document)) + b"\n"
+        try:
+            async for document in iterator:
+                yield dumps(serialize_document(document)) + b"\n"
+        except Exception as e:
+            # Re-raised so the server aborts the response instead of ending a truncated stream cleanly
+            logger.error(f"Error streaming documents: {e}")
+            raise
+    
+    return StreamingResponse(encode_documents(), media_type=NDJSON_MEDIA_TYPE)
+
+# Skill fields returned inside each category when no sparse fieldset is requested
+SKILL_FIELDS = ['name', 'proficiency']
+
+# Helper function to group skills by category
+def group_skills_by_category(skills: List[dict], skill_fields: List[str] = None) -> dict:
+    skill_fields = skill_fields or SKILL_FIELDS
+    categorized_skills = {}
+    with span("skills.group", skills=len(skills)):
+        for skill in skills:
+            category = skill['category']
+            if category not in categorized_skills:
+                categorized_skills[category] = {
+                    'category': category,
+                    'skills': []
+                }
+            
+            skill_data = {'id': str(skill['_id'])} if 'id' in skill_fields else {}
+            skill_data.update({field: skill[field] for field in skill_fields if field in skill})
+            categorized_skills[category]['skills'].append(skill_data)
+    return categorized_skills
+
+# Helper function rejecting sparse fieldsets that name fields the model does not have
+def validate_fields(model, requested_fields: Optional[List[str]]) -> Optional[List[str]]:
+    if not requested_fields:
+        return None
+    
+    unknown_fields = [field for field in requested_fields if field not in model.model_fields]
+    if unknown_fields:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown_fields)}")
+    return requested_fields
+
+# Dependency factory parsing a `fields=` sparse fieldset against a model's fields
+def sparse_fields(model):
+    def parse_fields(fields: Optional[str] = Query(None, description="Comma-separated list of fields to return")) -> Optional[List[str]]:
+        if not fields:
+            return None
+        return validate_fields(model, [field.strip() for field in fields.split(',') if field.strip()])
+    
+    return parse_fields
+
+# Keyset pagination over (order, _id) with opaque cursors
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(order: Any, document_id: Any) -> str:
+    raw = json.dumps([order, str(document_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order, document_id = json.loads(base64.urlsafe_b64decode(padded))
+        # `order` ends up in the query filter, so anything but a number (e.g. an operator document) is rejected
+        if isinstance(order, bool) or not isinstance(order, (int, float)):
+            raise ValueError("invalid order")
+        if not isinstance(document_id, str) or not ObjectId.is_valid(document_id):
+            raise ValueError("invalid document id")
+        return order, document_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def pagination_params(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of entries to return"),
+    after: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page")
+) -> Optional[dict]:
+    if limit is None and after is None:
+        return None
+    return {"limit": limit or DEFAULT_PAGE_SIZE, "after": decode_cursor(after) if after else None}
+
+# Helper function reading a profile's documents from the snapshot when serving from one, otherwise from MongoDB
+async def fetch_profile_documents(collection_name: str, profile_id: str, projection: Optional[dict] = None, limit: Optional[int] = None, after: Optional[tuple] = None) -> List[dict]:
+    snapshot = current_snapshot()
+    if snapshot:
+        return snapshot.get_documents(collection_name, projection, limit, after)
+    return await get_reader().get_documents_by_profile_id(
+        collection_name, profile_id, "order", projection=projection, limit=limit, after=after
+    )
+
+# Helper function streaming a profile's documents from the snapshot when serving from one, otherwise from MongoDB
+async def iter_profile_documents(collection_name: str, profile_id: str, projection: Optional[dict] = None, limit: Optional[int] = None, after: Optional[tuple] = None) -> AsyncIterator[dict]:
+    snapshot = current_snapshot()
+    if snapshot:
+        for document in snapshot.get_documents(collection_name, projection, limit, after):
+            yield document
+        return
+    
+    async for document in DatabaseService.iter_documents_by_profile_id(
+        collection_name, profile_id, "order", projection=projection, limit=limit, after=after
+    ):
+        yield document
+
+# Helper function to load one section's documents, a keyset page at a time when paginating
+async def get_section_documents(collection_name: str, profile_id: str, fields: Optional[List[str]], page: Optional[dict]) -> tuple:
+    if not page:
+        documents = await fetch_profile_documents(collection_name, profile_id, fields_to_projection(fields))
+        return serialize_documents(documents), None
+    
+    # Fetch one extra document to know whether another page follows
+    documents = await fetch_profile_documents(
+        collection_name, profile_id,
+        projection=fields_to_projection(fields, ['order']),
+        limit=page["limit"] + 1,
+        after=page["after"]
+    )
+    
+    next_cursor = None
+    if len(documents) > page["limit"]:
+        documents = documents[:page["limit"]]
+        next_cursor = encode_cursor(documents[-1].get('order'), documents[-1]['_id'])
+    # Drop `order` again unless the client asked for it, it was only projected for the cursor
+    return [select_fields(document, fields) for document in serialize_documents(documents)], next_cursor
+
+# Helper function to stream one section's documents as NDJSON
+async def stream_section_documents(collection_name: str, profile_id: str, fields: Optional[List[str]], page: Optional[dict]) -> StreamingResponse:
+    return await ndjson_response(iter_profile_documents(
+        collection_name, profile_id,
+        projection=fields_to_projection(fields),
+        limit=page["limit"] if page else None,
+        after=page["after"] if page else None
+    ))
+
+# Helper function to translate a sparse fieldset into a MongoDB projection
+def fields_to_projection(fields: Optional[List[str]], required_fields: List[str] = None) -> Optional[dict]:
+    if not fields:
+        return None
+    projection = {field: 1 for field in fields if field != 'id'}
+    for field in required_fields or []:
+        projection[field] = 1
+    # An empty projection would return whole documents when only `id` is requested
+    return projection or {"_id": 1}
+
+# Helper function to apply a sparse fieldset to an already built document
+def select_fields(document: dict, fields: Optional[List[str]]) -> dict:
+    if not fields:
+        return document
+    return {key: value for key, value in document.items() if key in fields or key == 'id'}
+
+# Helper function to build career statistics from profile, project and skill data
+def build_statistics(profile: dict, project_count: int, skill_category_count: int) -> dict:
+    return {
+        "years_experience": profile.get('years_experience', 31),
+        "years_at_nokia": 15,
+        "projects_managed": max(project_count * 50, 100),  # Estimate based on actual projects
+        "security_domains": skill_category_count,
+        "teams_managed_size": 25,
+        "budget_managed": "$2.5M+"
     }
 
+# Dependencies resolving the active profile from the snapshot or the process-wide cache
+async def get_active_profile() -> Optional[dict]:
+    with span("profile.resolve"):
+        snapshot = current_snapshot()
+        if snapshot:
+            return snapshot.get_profile()
+        return await ActiveProfile.get()
+
+async def get_active_profile_id() -> Optional[str]:
+    with span("profile.resolve"):
+        snapshot = current_snapshot()
+        if snapshot:
+            return snapshot.profile_id
+        return await ActiveProfile.get_id()
+
+# Helper function reading a profile's materialized statistics from the snapshot or MongoDB
+async def fetch_profile_statistics(profile_id: str) -> dict:
+    snapshot = current_snapshot()
+    if snapshot:
+        return snapshot.get_statistics()
+    return await get_profile_statistics(profile_id)
+
+# Helper function to load a profile's skills grouped by category
+async def load_skills(profile_id: str, fields: Optional[List[str]]) -> dict:
+    skill_fields = fields or SKILL_FIELDS
+    skills = await fetch_profile_documents(
+        Collections.SKILLS, profile_id, projection=fields_to_projection(skill_fields, ['category'])
+    )
+    return group_skills_by_category(skills, skill_fields)
+
+# Helper function to load a profile's career statistics
+async def load_statistics(profile: dict, fields: Optional[List[str]]) -> dict:
+    # Single point read of the materialized statistics document
+    metrics = await fetch_profile_statistics(str(profile['_id']))
+    
+    statistics = build_statistics(profile, metrics.get('project_count', 0), metrics.get('skill_category_count', 0))
+    return select_fields(statistics, fields)
+
+# Dependency guarding admin endpoints with the ADMIN_TOKEN shared secret
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+# Dependency guarding profile reports with the PROFILING_TOKEN shared secret
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)):
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling_authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
 # Profile endpoints
 @api_router.get("/profile", response_model=dict)
-async def get_profile():
+async def get_profile(profile: Optional[dict] = Depends(get_active_profile), fields: Optional[List[str]] = Depends(sparse_fields(Profile))):
     """Get complete profile information"""
     try:
-        profiles = await DatabaseService.get_documents(Collections.PROFILES)
-        if not profiles:
+        if not profile:
             raise HTTPException(status_code=404, detail="Profile not found")
         
-        profile = profiles[0]  # Get the first (and should be only) profile
-        
-        # Convert ObjectId to string for JSON serialization
-        if profile.get('_id'):
-            profile['id'] = str(profile['_id'])
-            del profile['_id']
-            
-        return create_response(True, profile, "Profile retrieved successfully")
+        return create_response(True, select_fields(serialize_document(profile), fields), "Profile retrieved successfully")
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error getting profile: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/experience", response_model=dict)
-async def get_experience():
+async def get_experience(
+    request: Request,
+    profile_id: Optional[str] = Depends(get_active_profile_id),
+    fields: Optional[List[str]] = Depends(sparse_fields(Experience)),
+    page: Optional[dict] = Depends(pagination_params)
+):
     """Get all work experience entries"""
     try:
-        # Get profile first to get profile_id
-        profiles = await DatabaseService.get_documents(Collections.PROFILES)
-        if not profiles:
-            return create_response(True, [], "No profile found")
+        if not profile_id:
+            return create_response(True, [], "No profile found", next_cursor=None)
         
-        profile_id = str(profiles[0]['_id'])
-        experiences = await DatabaseService.get_documents_by_profile_id(Collections.EXPERIENCES, profile_id, "order")
+        if wants_ndjson(request):
+            return await stream_section_documents(Collections.EXPERIENCES, profile_id, fields, page)
         
-        # Convert ObjectIds to strings
-        for exp in experiences:
-            exp['id'] = str(exp['_id'])
-            exp['profile_id'] = str(exp['profile_id'])
-            del exp['_id']
-            
-        return create_response(True, experiences, "Experience retrieved successfully")
+        experiences, next_cursor = await get_section_documents(Collections.EXPERIENCES, profile_id, fields, page)
+        
+        return create_response(True, experiences, "Experience retrieved successfully", next_cursor=next_cursor)
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error getting experience: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/skills", response_model=dict)
-async def get_skills():
+async def get_skills(profile_id: Optional[str] = Depends(get_active_profile_id), fields: Optional[List[str]] = Depends(sparse_fields(Skill))):
     """Get all skills categorized by domain"""
     try:
-        # Get profile first to get profile_id
-        profiles = await DatabaseService.get_documents(Collections.PROFILES)
-        if not profiles:
+        if not profile_id:
             return create_response(True, {}, "No profile found")
         
-        profile_id = str(profiles[0]['_id'])
-        skills = await DatabaseService.get_documents_by_profile_id(Collections.SKILLS, profile_id, "order")
+        categorized_skills = await load_skills(profile_id, fields)
         
-        # Group skills by category
-        categorized_skills = {}
-        for skill in skills:
-            category = skill['category']
-            if category not in categorized_skills:
-                categorized_skills[category] = {
-                    'category': category,
-                    'skills': []
-                }
-            
-            skill_data = {
-                'name': skill['name'],
-                'proficiency': skill['proficiency']
-            }
-            categorized_skills[category]['skills'].append(skill_data)
-            
         return create_response(True, categorized_skills, "Skills retrieved successfully")
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error getting skills: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/projects", response_model=dict)
-async def get_projects():
+async def get_projects(
+    request: Request,
+    profile_id: Optional[str] = Depends(get_active_profile_id),
+    fields: Optional[List[str]] = Depends(sparse_fields(Project)),
+    page: Optional[dict] = Depends(pagination_params)
+):
     """Get all key projects"""
     try:
-        # Get profile first to get profile_id
-        profiles = await DatabaseService.get_documents(Collections.PROFILES)
-        if not profiles:
-            return create_response(True, [], "No profile found")
+        if not profile_id:
+            return create_response(True, [], "No profile found", next_cursor=None)
         
-        profile_id = str(profiles[0]['_id'])
-        projects = await DatabaseService.get_documents_by_profile_id(Collections.PROJECTS, profile_id, "order")
+        if wants_ndjson(request):
+            return await stream_section_documents(Collections.PROJECTS, profile_id, fields, page)
         
-        # Convert ObjectIds to strings
-        for project in projects:
-            project['id'] = str(project['_id'])
-            project['profile_id'] = str(project['profile_id'])
-            del project['_id']
-            
-        return create_response(True, projects, "Projects retrieved successfully")
+        projects, next_cursor = await get_section_documents(Collections.PROJECTS, profile_id, fields, page)
+        
+        return create_response(True, projects, "Projects retrieved successfully", next_cursor=next_cursor)
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error getting projects: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/certifications", response_model=dict)
-async def get_certifications():
+async def get_certifications(
+    request: Request,
+    profile_id: Optional[str] = Depends(get_active_profile_id),
+    fields: Optional[List[str]] = Depends(sparse_fields(Certification)),
+    page: Optional[dict] = Depends(pagination_params)
+):
     """Get all professional certifications"""
     try:
-        # Get profile first to get profile_id
-        profiles = await DatabaseService.get_documents(Collections.PROFILES)
-        if not profiles:
-            return create_response(True, [], "No profile found")
+        if not profile_id:
+            return create_response(True, [], "No profile found", next_cursor=None)
         
-        profile_id = str(profiles[0]['_id'])
-        certifications = await DatabaseService.get_documents_by_profile_id(Collections.CERTIFICATIONS, profile_id, "order")
+        if wants_ndjson(request):
+            return await stream_section_documents(Collections.CERTIFICATIONS, profile_id, fields, page)
         
-        # Convert ObjectIds to strings
-        for cert in certifications:
-            cert['id'] = str(cert['_id'])
-            cert['profile_id'] = str(cert['profile_id'])
-            del cert['_id']
-            
-        return create_response(True, certifications, "Certifications retrieved successfully")
+        certifications, next_cursor = await get_section_documents(Collections.CERTIFICATIONS, profile_id, fields, page)
+        
+        return create_response(True, certifications, "Certifications retrieved successfully", next_cursor=next_cursor)
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error getting certifications: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/education", response_model=dict)
-async def get_education():
+async def get_education(
+    request: Request,
+    profile_id: Optional[str] = Depends(get_active_profile_id),
+    fields: Optional[List[str]] = Depends(sparse_fields(Education)),
+    page: Optional[dict] = Depends(pagination_params)
+):
     """Get education information"""
     try:
-        # Get profile first to get profile_id
-        profiles = await DatabaseService.get_documents(Collections.PROFILES)
-        if not profiles:
-            return create_response(True, [], "No profile found")
+        if not profile_id:
+            return create_response(True, [], "No profile found", next_cursor=None)
         
-        profile_id = str(profiles[0]['_id'])
-        education = await DatabaseService.get_documents_by_profile_id(Collections.EDUCATION, profile_id, "order")
+        if wants_ndjson(request):
+            return await stream_section_documents(Collections.EDUCATION, profile_id, fields, page)
         
-        # Convert ObjectIds to strings
-        for edu in education:
-            edu['id'] = str(edu['_id'])
-            edu['profile_id'] = str(edu['profile_id'])
-            del edu['_id']
-            
-        return create_response(True, education, "Education retrieved successfully")
+        education, next_cursor = await get_section_documents(Collections.EDUCATION, profile_id, fields, page)
+        
+        return create_response(True, education, "Education retrieved successfully", next_cursor=next_cursor)
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error getting education: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/statistics", response_model=dict)
-async def get_statistics():
+async def get_statistics(profile: Optional[dict] = Depends(get_active_profile), fields: Optional[List[str]] = Depends(sparse_fields(Statistics))):
     """Get career statistics and metrics"""
     try:
-        # Get profile first
-        profiles = await DatabaseService.get_documents(Collections.PROFILES)
-        if not profiles:
+        if not profile:
             return create_response(True, {}, "No profile found")
         
-        profile = profiles[0]
-        profile_id = str(profile['_id'])
+        statistics = await load_statistics(profile, fields)
         
-        # Count projects
-        project_count = await DatabaseService.count_documents(Collections.PROJECTS, {"profile_id": profile['_id']})
+        return create_response(True, statistics, "Statistics retrieved successfully")
+    except DatabaseUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting statistics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/portfolio", response_model=dict)
+async def get_portfolio():
+    """Get the profile and every portfolio section in a single database round-trip"""
+    try:
+        snapshot = current_snapshot()
+        if snapshot:
+            bundle = snapshot.get_bundle()
+        else:
+            bundle = await DatabaseService.get_profile_bundle(PROFILE_CHILD_COLLECTIONS)
+        if not bundle:
+            return create_response(True, {}, "No profile found")
+        
+        experiences = bundle.pop(Collections.EXPERIENCES)
+        skills = bundle.pop(Collections.SKILLS)
+        projects = bundle.pop(Collections.PROJECTS)
+        certifications = bundle.pop(Collections.CERTIFICATIONS)
+        education = bundle.pop(Collections.EDUCATION)
         
-        # Get skills count by category
-        skills = await DatabaseService.get_documents_by_profile_id(Collections.SKILLS, profile_id)
+        profile = bundle
         skill_categories = set(skill['category'] for skill in skills)
+        statistics = build_statistics(profile, len(projects), len(skill_categories))
         
-        statistics = {
-            "years_experience": profile.get('years_experience', 31),
-            "years_at_nokia": 15,
-            "projects_managed": max(project_count * 50, 100),  # Estimate based on actual projects
-            "security_domains": len(skill_categories),
-            "teams_managed_size": 25,
-            "budget_managed": "$2.5M+"
+        portfolio = {
+            "profile": serialize_document(profile),
+            "experience": serialize_documents(experiences),
+            "skills": group_skills_by_category(skills),
+            "projects": serialize_documents(projects),
+            "certifications": serialize_documents(certifications),
+            "education": serialize_documents(education),
+            "statistics": statistics
         }
         
-        return create_response(True, statistics, "Statistics retrieved successfully")
+        return create_response(True, portfolio, "Portfolio retrieved successfully")
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Error getting statistics: {e}")
+        logger.error(f"Error getting portfolio: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Sections resolvable through /batch, with the model their sparse fieldsets are checked against
+BATCH_SECTIONS = {
+    "profile": Profile,
+    "experience": Experience,
+    "skills": Skill,
+    "projects": Project,
+    "certifications": Certification,
+    "education": Education,
+    "statistics": Statistics
+}
+
+# Batch sections backed by a paginated child collection
+BATCH_SECTION_COLLECTIONS = {
+    "experience": Collections.EXPERIENCES,
+    "projects": Collections.PROJECTS,
+    "certifications": Collections.CERTIFICATIONS,
+    "education": Collections.EDUCATION
+}
+
+# Helper function resolving one /batch section for an already loaded profile
+async def resolve_batch_section(section: str, profile: dict, fields: Optional[List[str]], page: Optional[dict]) -> dict:
+    profile_id = str(profile['_id'])
+    if section == "profile":
+        return {"data": select_fields(serialize_document(profile), fields)}
+    if section == "skills":
+        return {"data": await load_skills(profile_id, fields)}
+    if section == "statistics":
+        return {"data": await load_statistics(profile, fields)}
+    
+    documents, next_cursor = await get_section_documents(BATCH_SECTION_COLLECTIONS[section], profile_id, fields, page)
+    return {"data": documents, "next_cursor": next_cursor}
+
+@api_router.post("/batch", response_model=dict)
+async def get_batch(batch: BatchRequest, profile: Optional[dict] = Depends(get_active_profile)):
+    """Resolve several portfolio sections concurrently, each with its own fields and paging"""
+    sections = list(dict.fromkeys(batch.sections))
+    unknown_sections = [section for section in [*sections, *batch.options] if section not in BATCH_SECTIONS]
+    if unknown_sections:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown_sections)}")
+    
+    # Validate every section's options before touching the database
+    section_requests = []
+    for section in sections:
+        options = batch.options.get(section) or BatchSectionOptions()
+        fields = validate_fields(BATCH_SECTIONS[section], options.fields)
+        page = pagination_params(options.limit, options.after) if section in BATCH_SECTION_COLLECTIONS else None
+        section_requests.append((section, fields, page))
+    
+    if not profile:
+        return create_response(True, {}, "No profile found")
+    
+    results = await asyncio.gather(
+        *(resolve_batch_section(section, profile, fields, page) for section, fields, page in section_requests),
+        return_exceptions=True
+    )
+    
+    # A failing section is reported in place instead of failing the whole batch
+    data = {}
+    for (section, _, _), result in zip(section_requests, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error resolving batch section {section}: {result}")
+            data[section] = {"success": False, "data": None, "error": str(result)}
+        else:
+            data[section] = {"success": True, "error": None, **result}
+    
+    return create_response(True, data, "Batch retrieved successfully")
+
 @api_router.post("/contact", response_model=dict)
 async def submit_contact_form(contact_data: ContactSubmissionCreate):
     """Submit contact form"""
@@ -234,12 +571,9 @@ async def submit_contact_form(contact_data: ContactSubmissionCreate):
         contact_dict = contact_data.dict()
         created_contact = await DatabaseService.create_document(Collections.CONTACT_SUBMISSIONS, contact_dict)
         
-        # Convert ObjectId to string
-        if created_contact.get('_id'):
-            created_contact['id'] = str(created_contact['_id'])
-            del created_contact['_id']
-        
-        return create_response(True, created_contact, "Thank you for your message. I will respond within 24-48 hours.")
+        return create_response(True, serialize_document(created_contact), "Thank you for your message. I will respond within 24-48 hours.")
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error submitting contact form: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -248,26 +582,164 @@ async def submit_contact_form(contact_data: ContactSubmissionCreate):
 async def root():
     return create_response(True, {"message": "Lay Been Tan Portfolio API"}, "API is running successfully")
 
-@api_router.get("/health")
-async def health_check():
-    """Health check endpoint"""
+@api_router.post("/admin/snapshot/rebuild", response_model=dict, dependencies=[Depends(require_admin_token)])
+async def rebuild_portfolio_snapshot():
+    """Rebuild the in-memory portfolio snapshot served in snapshot mode"""
     try:
-        # Test database connection
-        profiles = await DatabaseService.get_documents(Collections.PROFILES)
-        db_status = "connected" if profiles is not None else "disconnected"
-        
-        return create_response(True, {
-            "status": "healthy",
-            "database": db_status,
-            "api_version": "1.0.0"
-        }, "API health check passed")
+        snapshot = await rebuild_snapshot()
+        return create_response(True, snapshot.describe() if snapshot else None, "Snapshot rebuilt successfully")
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return create_response(False, None, None, f"Health check failed: {str(e)}")
+        logger.error(f"Error rebuilding snapshot: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/debug/profiles/{report_id}", dependencies=[Depends(require_profiling_token)], include_in_schema=False)
+async def get_profile_report(report_id: str):
+    """Collapsed stacks of a profiled request, named by its X-Profile-Report response header"""
+    report = read_profile_report(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile report not found")
+    return Response(report, media_type="text/plain")
+
+@api_router.get("/metrics", dependencies=[Depends(require_admin_token)])
+async def get_metrics():
+    """Runtime counters for the database query cache, admin only as they include recent slow-query shapes"""
+    return create_response(True, {
+        "cache": query_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "database_breaker": database_breaker.stats(),
+        "connection_pool": connection_pool_stats(),
+        "cache_sync": {"mode": ChangeWatcher.mode},
+        "snapshot": current_snapshot().describe() if current_snapshot() else None,
+        "response_cache": response_cache.stats(),
+        "dataloader": DataLoaderStats.stats(),
+        "slow_queries": slow_query_log.stats(),
+        "tracing": trace_exporter.stats()
+    }, "Metrics retrieved successfully")
+
+# Cache, single-flight, breaker and pool state exposed alongside the request and query histograms
+def collect_runtime_metrics():
+    for cache_name, stats in (("query", query_cache.stats()), ("response", response_cache.stats())):
+        labels = {"cache": cache_name}
+        yield "cache_hits_total", "counter", "Cache lookups answered from the cache", labels, stats["hits"]
+        yield "cache_misses_total", "counter", "Cache lookups that missed", labels, stats["misses"]
+        yield "cache_hit_ratio", "gauge", "Share of cache lookups answered from the cache", labels, stats["hit_ratio"]
+        yield "cache_entries", "gauge", "Entries currently cached", labels, stats["entries"]
+
+    flights = single_flight.stats()
+    yield "single_flight_in_flight", "gauge", "Database reads currently in flight", {}, flights["in_flight"]
+    yield "single_flight_waiters", "gauge", "Callers currently waiting on an in-flight read", {}, flights["waiters"]
+    yield "single_flight_max_waiters", "gauge", "Most callers seen waiting on one in-flight read", {}, flights["max_waiters"]
+    yield "single_flight_coalesced_total", "counter", "Reads that joined an identical in-flight read", {}, flights["coalesced"]
+
+    breaker = database_breaker.stats()
+    for state in (database_breaker.CLOSED, database_breaker.HALF_OPEN, database_breaker.OPEN):
+        yield "database_breaker_state", "gauge", "MongoDB circuit breaker state", {"state": state}, int(breaker["state"] == state)
+    yield "database_breaker_rejections_total", "counter", "Database calls rejected by the open breaker", {}, breaker["rejections"]
+
+    yield "db_slow_queries_total", "counter", "Database queries slower than the slow-query threshold", {}, slow_query_log.slow_queries
+
+    pool = connection_pool_stats()
+    yield "db_pool_open_connections", "gauge", "Open MongoDB connections", {}, pool["open_connections"]
+    yield "db_pool_in_use_connections", "gauge", "MongoDB connections checked out", {}, pool["in_use"]
+    yield "db_pool_checkout_failures_total", "counter", "Failed MongoDB connection checkouts", {}, pool["checkout_failures"]
+
+metrics_registry.register_collector(collect_runtime_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, query, cache and pool metrics in the Prometheus text format"""
+    return Response(metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@api_router.get("/health")
+async def health_check():
+    """Health check endpoint, answered from the cached database ping"""
+    connected = await DatabaseHealth.check()
+    if not connected:
+        return create_response(False, None, None, f"Health check failed: {DatabaseHealth.error}")
+    
+    return create_response(True, {
+        "status": "healthy",
+        "database": "connected",
+        "api_version": "1.0.0"
+    }, "API health check passed")
+
+@api_router.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the worker is running its event loop, no I/O involved"""
+    return create_response(True, {"status": "alive"}, "API is alive")
+
+@api_router.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: MongoDB answered a recent ping, or requests are served from the snapshot"""
+    connected = await DatabaseHealth.check()
+    ready = connected or current_snapshot() is not None
+    
+    response = create_response(ready, {
+        "status": "ready" if ready else "not_ready",
+        "database": "connected" if connected else "disconnected",
+        "snapshot": current_snapshot() is not None
+    }, "API is ready" if ready else None, None if ready else f"Database unavailable: {DatabaseHealth.error}")
+    if not ready:
+        response.status_code = 503
+    return response
+
+@api_router.get("/health/details", dependencies=[Depends(require_admin_token)])
+async def health_details():
+    """Diagnostics: database, connection pool, circuit breaker and cache state; admin only, unlike the probes"""
+    await DatabaseHealth.check()
+    return create_response(True, {
+        "api_version": "1.0.0",
+        "uptime_seconds": round(time.monotonic() - STARTED_AT, 3),
+        "database": DatabaseHealth.describe(),
+        "database_breaker": database_breaker.stats(),
+        "connection_pool": connection_pool_stats(),
+        "indexes": {"ready": IndexBuilder.ready, "error": IndexBuilder.error},
+        "cache": query_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "cache_sync": {"mode": ChangeWatcher.mode},
+        "snapshot": current_snapshot().describe() if current_snapshot() else None
+    }, "Diagnostics retrieved successfully")
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Collections each cacheable GET response is built from; a write to any of them evicts the cached body
+CACHED_ROUTES = {
+    "/api/profile": [Collections.PROFILES],
+    "/api/experience": [Collections.PROFILES, Collections.EXPERIENCES],
+    "/api/skills": [Collections.PROFILES, Collections.SKILLS],
+    "/api/projects": [Collections.PROFILES, Collections.PROJECTS],
+    "/api/certifications": [Collections.PROFILES, Collections.CERTIFICATIONS],
+    "/api/education": [Collections.PROFILES, Collections.EDUCATION],
+    "/api/statistics": [Collections.PROFILES, Collections.STATISTICS],
+    "/api/portfolio": [Collections.PROFILES, Collections.STATISTICS, *PROFILE_CHILD_COLLECTIONS]
+}
+
+# Dedupe and coalesce the database reads issued while handling one request
+app.add_middleware(DataLoaderMiddleware)
+
+# Serve repeat GETs from pre-serialized bodies; in snapshot mode bodies are keyed by snapshot version
+app.add_middleware(
+    ResponseCacheMiddleware,
+    routes=CACHED_ROUTES,
+    version_key=lambda: current_snapshot().version if current_snapshot() else None
+)
+
+# Compress uncached responses and streams; cached bodies arrive already encoded from their precomputed variants
+app.add_middleware(CompressionMiddleware)
+
+# Profile requests sent with the X-Profile-Token header; without it requests pass straight through
+app.add_middleware(ProfilingMiddleware)
+
+# Outside the response cache, so cached and degraded responses are timed too
+app.add_middleware(MetricsMiddleware, route_paths=lambda: [route.path for route in app.routes])
+
+# Trace a sample of requests, from the first middleware to the last byte handed to the server
+app.add_middleware(TracingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -0,0 +1,181 @@
+from bson import ObjectId
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import bisect
+import logging
+import os
+import signal
+
+from database import DatabaseService, Collections, PROFILE_CHILD_COLLECTIONS, register_change_listener
+from materialized import get_profile_statistics
+
+logger = logging.getLogger(__name__)
+
+# Serve every GET from an in-memory snapshot instead of querying MongoDB
+SNAPSHOT_MODE = os.environ.get('PORTFOLIO_SNAPSHOT_MODE', 'false').lower() == 'true'
+
+# Seconds to wait after a data change before rebuilding, so bursts of writes cause one rebuild
+SNAPSHOT_REBUILD_DELAY = float(os.environ.get('PORTFOLIO_SNAPSHOT_REBUILD_DELAY', 1))
+
+# Collections whose changes make the snapshot stale
+SNAPSHOT_SOURCE_COLLECTIONS = {Collections.PROFILES, Collections.STATISTICS, *PROFILE_CHILD_COLLECTIONS}
+
+
+def _freeze(documents: List[dict]) -> Tuple[MappingProxyType, ...]:
+    return tuple(MappingProxyType(dict(document)) for document in documents)
+
+
+def _project(document: MappingProxyType, projection: Optional[dict]) -> dict:
+    if not projection:
+        return dict(document)
+    return {key: value for key, value in document.items() if key in projection or key == '_id'}
+
+
+class PortfolioSnapshot:
+    """Immutable copy of the active profile, its child collections and its statistics"""
+
+    def __init__(self, profile: dict, sections: Dict[str, List[dict]], statistics: dict, version: int):
+        self.profile = MappingProxyType(dict(profile))
+        self.sections = MappingProxyType({name: _freeze(documents) for name, documents in sections.items()})
+        self.statistics = MappingProxyType(dict(statistics))
+        self.version = version
+        self.built_at = datetime.utcnow()
+
+        # Keyset positions of every section, for resuming pages with bisect
+        self._keys = MappingProxyType({
+            name: tuple((document.get('order'), document['_id']) for document in documents)
+            for name, documents in self.sections.items()
+        })
+
+    @property
+    def profile_id(self) -> str:
+        return str(self.profile['_id'])
+
+    def get_profile(self) -> dict:
+        return dict(self.profile)
+
+    def get_statistics(self) -> dict:
+        return dict(self.statistics)
+
+    def get_documents(self, collection_name: str, projection: Optional[dict] = None, limit: Optional[int] = None, after: Optional[tuple] = None) -> List[dict]:
+        """Same contract as DatabaseService.get_documents_by_profile_id, answered from memory"""
+        documents = self.sections.get(collection_name, ())
+
+        start = 0
+        if after:
+            after_value, after_id = after
+            start = bisect.bisect_right(self._keys[collection_name], (after_value, ObjectId(after_id)))
+        end = start + limit if limit else len(documents)
+
+        return [_project(document, projection) for document in documents[start:end]]
+
+    def get_bundle(self) -> dict:
+        """Same contract as DatabaseService.get_profile_bundle, answered from memory"""
+        bundle = self.get_profile()
+        for collection_name in self.sections:
+            bundle[collection_name] = self.get_documents(collection_name)
+        return bundle
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "built_at": self.built_at.isoformat(),
+            "documents": {name: len(documents) for name, documents in self.sections.items()}
+        }
+
+
+class Snapshot:
+    current: Optional[PortfolioSnapshot] = None
+    version: int = 0
+    rebuild_task: Optional[asyncio.Task] = None
+    rebuild_pending: bool = False
+
+
+def current_snapshot() -> Optional[PortfolioSnapshot]:
+    """The snapshot to serve from, or None when requests should go to MongoDB"""
+    return Snapshot.current if SNAPSHOT_MODE else None
+
+
+async def build_snapshot() -> Optional[PortfolioSnapshot]:
+    """Compile the profile and every child collection into a new immutable snapshot"""
+    bundle = await DatabaseService.get_profile_bundle(PROFILE_CHILD_COLLECTIONS)
+    if not bundle:
+        return None
+
+    sections = {name: bundle.pop(name) for name in PROFILE_CHILD_COLLECTIONS}
+    statistics = await get_profile_statistics(str(bundle['_id']))
+    return PortfolioSnapshot(bundle, sections, statistics, Snapshot.version + 1)
+
+
+async def rebuild_snapshot() -> Optional[PortfolioSnapshot]:
+    """Build a new snapshot and swap it in atomically; the old one keeps serving until then"""
+    snapshot = await build_snapshot()
+    Snapshot.version += 1
+    Snapshot.current = snapshot
+    if snapshot:
+        logger.info(f"Portfolio snapshot v{snapshot.version} built: {snapshot.describe()['documents']}")
+    else:
+        logger.info("Portfolio snapshot cleared, no profile found")
+    return snapshot
+
+
+async def _run_scheduled_rebuilds(delay: float):
+    while True:
+        await asyncio.sleep(delay)
+        Snapshot.rebuild_pending = False
+        try:
+            await rebuild_snapshot()
+        except Exception as e:
+            logger.error(f"Error rebuilding portfolio snapshot: {e}")
+        if not Snapshot.rebuild_pending:
+            break
+
+
+def schedule_snapshot_rebuild(delay: float = SNAPSHOT_REBUILD_DELAY):
+    """Rebuild the snapshot in the background, coalescing requests made while one is pending"""
+    if not SNAPSHOT_MODE:
+        return
+
+    Snapshot.rebuild_pending = True
+    if Snapshot.rebuild_task is None or Snapshot.rebuild_task.done():
+        try:
+            Snapshot.rebuild_task = asyncio.get_running_loop().create_task(_run_scheduled_rebuilds(delay))
+        except RuntimeError:
+            # No running event loop, e.g. a write from a synchronous script
+            Snapshot.rebuild_pending = False
+
+
+def _rebuild_on_change(collection_name: str):
+    if collection_name in SNAPSHOT_SOURCE_COLLECTIONS:
+        schedule_snapshot_rebuild()
+
+
+async def start_snapshot():
+    if not SNAPSHOT_MODE:
+        return
+
+    try:
+        await rebuild_snapshot()
+    except Exception as e:
+        logger.error(f"Error building portfolio snapshot, serving from MongoDB until a rebuild succeeds: {e}")
+
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, schedule_snapshot_rebuild, 0)
+    except (NotImplementedError, AttributeError, RuntimeError):
+        logger.warning("SIGHUP snapshot rebuilds are not supported on this platform")
+
+
+async def stop_snapshot():
+    if Snapshot.rebuild_task:
+        Snapshot.rebuild_task.cancel()
+        try:
+            await Snapshot.rebuild_task
+        except asyncio.CancelledError:
+            pass
+        Snapshot.rebuild_task = None
+    Snapshot.current = None
+
+
+register_change_listener(_rebuild_on_change)
@@ -0,0 +1,321 @@
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# Head-based sampling: decided once when a request starts; an incoming W3C traceparent header's sampled flag takes precedence
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'true').lower() == 'true'
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.01))
+TRACE_SERVICE_NAME = os.environ.get('TRACE_SERVICE_NAME', 'portfolio-api')
+
+# Sampled traces are appended as OTLP/JSON lines to a rotating file, and posted to an OTLP/HTTP collector when one is set
+TRACE_EXPORT_FILE = os.environ.get('TRACE_EXPORT_FILE', '/tmp/portfolio-traces.jsonl')
+TRACE_EXPORT_FILE_MAX_BYTES = int(os.environ.get('TRACE_EXPORT_FILE_MAX_BYTES', 10 * 1024 * 1024))
+TRACE_EXPORT_FILE_BACKUPS = int(os.environ.get('TRACE_EXPORT_FILE_BACKUPS', 3))
+TRACE_EXPORT_ENDPOINT = os.environ.get('TRACE_EXPORT_ENDPOINT')
+TRACE_EXPORT_QUEUE_SIZE = int(os.environ.get('TRACE_EXPORT_QUEUE_SIZE', 1000))
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("span", default=None)
+
+
+class Trace:
+    """The spans recorded while handling one request"""
+    __slots__ = ("trace_id", "spans", "finished")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self.finished = False
+
+
+class Span:
+    """A timed operation within a trace; as a context manager it is the parent of the spans opened inside it"""
+    __slots__ = ("trace", "name", "span_id", "parent_id", "attributes", "start", "end", "error", "_token")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = 0
+        self.end = 0
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def begin(self) -> "Span":
+        self.start = time.time_ns()
+        return self
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.end = time.time_ns()
+        if error is not None:
+            self.error = str(error) or type(error).__name__
+        # Spans of background work that outlives its request are dropped
+        if not self.trace.finished:
+            self.trace.spans.append(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.finish(exc)
+
+
+class _NoSpan:
+    """Stand-in returned outside of sampled traces, so callers need no checks"""
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+def span(name: str, **attributes) -> Any:
+    """A child span of the current one, or a no-op when the request is not traced"""
+    parent = _current_span.get()
+    if parent is None:
+        return NO_SPAN
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+def _document_count(result) -> Optional[int]:
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+
+def traced(func):
+    """Run a DatabaseService method inside a span named after it"""
+    if not TRACING_ENABLED:
+        return func
+
+    name = f"db.{func.__name__}"
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def stream_wrapper(collection_name: str, *args, **kwargs):
+            parent = _current_span.get()
+            if parent is None:
+                async for document in func(collection_name, *args, **kwargs):
+                    yield document
+                return
+
+            # Not made current: between documents the consumer runs, and its spans are not part of this one
+            current = Span(parent.trace, name, parent.span_id, {"collection": collection_name}).begin()
+            documents = 0
+            error = None
+            try:
+                async for document in func(collection_name, *args, **kwargs):
+                    documents += 1
+                    yield document
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                current.set("documents", documents)
+                current.finish(error)
+        return stream_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(collection_name: str, *args, **kwargs):
+        with span(name, collection=collection_name) as current:
+            result = await func(collection_name, *args, **kwargs)
+            documents = _document_count(result)
+            if documents is not None:
+                current.set("documents", documents)
+            return result
+    return wrapper
+
+
+# OTLP/JSON encoding of finished traces
+def _attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def encode_trace(trace: Trace) -> dict:
+    spans = []
+    for finished in trace.spans:
+        encoded = {
+            "traceId": trace.trace_id,
+            "spanId": finished.span_id,
+            "name": finished.name,
+            "kind": 2 if finished.name.startswith("HTTP ") else 1,
+            "startTimeUnixNano": str(finished.start),
+            "endTimeUnixNano": str(finished.end),
+            "attributes": [_attribute(key, value) for key, value in finished.attributes.items()],
+            "status": {"code": 2, "message": finished.error} if finished.error else {"code": 1}
+        }
+        if finished.parent_id:
+            encoded["parentSpanId"] = finished.parent_id
+        spans.append(encoded)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", TRACE_SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}]
+        }]
+    }
+
+
+class TraceExporter:
+    """Write sampled traces from a background thread, so exporting never blocks the event loop"""
+
+    def __init__(self, path: Optional[str], endpoint: Optional[str], queue_size: int):
+        self.path = path
+        self.endpoint = endpoint
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._file: Optional[RotatingFileHandler] = None
+        self.exported = 0
+        self.dropped = 0
+        self.failures = 0
+
+    def export(self, trace: Trace):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                break
+            try:
+                self._write(json.dumps(encode_trace(trace), separators=(",", ":")))
+                self.exported += 1
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Error exporting trace {trace.trace_id}: {e}")
+
+    def _write(self, line: str):
+        if self.path:
+            if self._file is None:
+                self._file = RotatingFileHandler(self.path, maxBytes=TRACE_EXPORT_FILE_MAX_BYTES, backupCount=TRACE_EXPORT_FILE_BACKUPS)
+                self._file.setFormatter(logging.Formatter("%(message)s"))
+            self._file.emit(logging.makeLogRecord({"msg": line}))
+        if self.endpoint:
+            request = urllib.request.Request(self.endpoint, data=line.encode(), headers={"Content-Type": "application/json"})
+            urllib.request.urlopen(request, timeout=5).close()
+
+    def stop(self):
+        """Flush the traces still queued"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": TRACING_ENABLED,
+            "sample_rate": TRACE_SAMPLE_RATE,
+            "queued": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failures": self.failures
+        }
+
+
+trace_exporter = TraceExporter(TRACE_EXPORT_FILE or None, TRACE_EXPORT_ENDPOINT, TRACE_EXPORT_QUEUE_SIZE)
+
+
+def _start_trace(scope) -> Optional[Span]:
+    """The request's root span when the request is sampled, None otherwise"""
+    traceparent = next((value for name, value in scope["headers"] if name == b"traceparent"), None)
+    match = TRACEPARENT_PATTERN.match(traceparent.decode("latin-1")) if traceparent else None
+    if match:
+        trace_id, parent_id, flags = match.groups()
+        if not int(flags, 16) & 1:
+            return None
+    elif random.random() < TRACE_SAMPLE_RATE:
+        trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+    else:
+        return None
+
+    return Span(Trace(trace_id), f"HTTP {scope['method']} {scope['path']}", parent_id, {
+        "http.method": scope["method"],
+        "http.target": scope["path"]
+    })
+
+
+class TracingMiddleware:
+    """Open a root span for sampled requests, with a child span for sending the response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not TRACING_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root = _start_trace(scope)
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        sending: Optional[Span] = None
+        traceparent = f"00-{root.trace.trace_id}-{root.span_id}-01".encode()
+
+        async def send_traced(message):
+            nonlocal sending
+            if message["type"] == "http.response.start":
+                root.set("http.status_code", message["status"])
+                message = {**message, "headers": [*message.get("headers", []), (b"traceparent", traceparent)]}
+                sending = Span(root.trace, "http.send", root.span_id, {"bytes": 0}).begin()
+            elif message["type"] == "http.response.body" and sending is not None:
+                sending.attributes["bytes"] += len(message.get("body", b""))
+            await send(message)
+            # Covers handing the body to the server, including waiting on a slow client
+            if message["type"] == "http.response.body" and not message.get("more_body") and sending is not None:
+                sending.finish()
+
+        try:
+            with root:
+                try:
+                    await self.app(scope, receive, send_traced)
+                finally:
+                    if sending is not None and not sending.end:
+                        sending.finish()
+        finally:
+            root.trace.finished = True
+            trace_exporter.export(root.trace)
@@ -6,6 +6,7 @@ Tests all backend endpoints for proper functionality and data integrity
 
 import asyncio
 import aiohttp
+import base64
 import json
 import sys
 import os
@@ -14,6 +15,11 @@ from datetime import datetime
 
 # Backend URL from frontend environment
 BACKEND_URL = "https://project-pro-profile.preview.emergentagent.com/api"
+# Shared secret of the admin-only diagnostics endpoints
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# Prometheus metrics are served outside the /api prefix
+METRICS_URL = BACKEND_URL[:-len("/api")] + "/metrics"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 class PortfolioAPITester:
     def __init__(self):
@@ -58,6 +64,14 @@ class PortfolioAPITester:
         except Exception as e:
             return 0, {"error": str(e)}
     
+    async def make_raw_request(self, method: str, url: str, **kwargs) -> tuple:
+        """Make HTTP request and return status, headers, raw body"""
+        try:
+            async with self.session.request(method, url, **kwargs) as response:
+                return response.status, response.headers, await response.read()
+        except Exception as e:
+            return 0, {}, str(e).encode()
+    
     def validate_response_structure(self, data: Dict, endpoint: str) -> bool:
         """Validate standard API response structure"""
         if not isinstance(data, dict):
@@ -358,6 +372,282 @@ class PortfolioAPITester:
             
         self.log_test("/statistics", "PASS", "Statistics data retrieved successfully", stats)
     
+    async def test_portfolio_endpoint(self):
+        """Test /api/portfolio endpoint"""
+        status, data = await self.make_request("GET", "/portfolio")
+        
+        if status != 200:
+            self.log_test("/portfolio", "FAIL", f"HTTP {status}: {data}")
+            return
+            
+        if not self.validate_response_structure(data, "/portfolio"):
+            return
+            
+        if not data["success"]:
+            self.log_test("/portfolio", "FAIL", f"Portfolio request failed: {data.get('error', 'Unknown error')}")
+            return
+            
+        portfolio = data["data"]
+        if not isinstance(portfolio, dict):
+            self.log_test("/portfolio", "FAIL", "Portfolio data should be a dictionary")
+            return
+            
+        # Validate that every section is present in the bundle
+        required_sections = ["profile", "experience", "skills", "projects", "certifications", "education", "statistics"]
+        missing_sections = [section for section in required_sections if section not in portfolio]
+        
+        if missing_sections:
+            self.log_test("/portfolio", "FAIL", f"Missing portfolio sections: {missing_sections}")
+            return
+            
+        for section in ["experience", "projects", "certifications", "education"]:
+            if not isinstance(portfolio[section], list):
+                self.log_test("/portfolio", "FAIL", f"Portfolio section {section} should be a list")
+                return
+                
+        if not isinstance(portfolio["skills"], dict):
+            self.log_test("/portfolio", "FAIL", "Portfolio skills should be a dictionary")
+            return
+            
+        if "Lay Been Tan" not in portfolio["profile"].get("name", ""):
+            self.log_test("/portfolio", "FAIL", f"Profile name incorrect: {portfolio['profile'].get('name')}")
+            return
+            
+        self.log_test("/portfolio", "PASS", f"Portfolio bundle retrieved successfully ({len(portfolio['projects'])} projects)")
+    
+    async def test_batch_endpoint(self):
+        """Test /api/batch endpoint"""
+        payload = {
+            "sections": ["profile", "projects", "skills"],
+            "options": {"profile": {"fields": ["name"]}, "projects": {"limit": 1}}
+        }
+        status, data = await self.make_request("POST", "/batch", json=payload)
+        
+        if status != 200:
+            self.log_test("/batch", "FAIL", f"HTTP {status}: {data}")
+            return
+            
+        if not self.validate_response_structure(data, "/batch"):
+            return
+            
+        if not data["success"]:
+            self.log_test("/batch", "FAIL", f"Batch request failed: {data.get('error', 'Unknown error')}")
+            return
+            
+        results = data["data"]
+        missing_sections = [section for section in payload["sections"] if section not in results]
+        if missing_sections:
+            self.log_test("/batch", "FAIL", f"Missing batch sections: {missing_sections}")
+            return
+            
+        failed_sections = [section for section, result in results.items() if not result.get("success")]
+        if failed_sections:
+            self.log_test("/batch", "FAIL", f"Batch sections failed: {failed_sections}")
+            return
+            
+        if set(results["profile"]["data"]) != {"id", "name"}:
+            self.log_test("/batch", "FAIL", f"Profile fields not applied: {list(results['profile']['data'])}")
+            return
+            
+        if len(results["projects"]["data"]) != 1:
+            self.log_test("/batch", "FAIL", f"Projects limit not applied: {len(results['projects']['data'])} entries")
+            return
+            
+        status, data = await self.make_request("POST", "/batch", json={"sections": ["unknown"]})
+        if status != 400:
+            self.log_test("/batch", "FAIL", f"Unknown section should be rejected with HTTP 400, got {status}")
+            return
+            
+        self.log_test("/batch", "PASS", f"Batch resolved {len(results)} sections")
+    
+    async def test_pagination(self):
+        """Test keyset pagination and cursor round-trips on /api/experience"""
+        status, data = await self.make_request("GET", "/experience")
+        if status != 200:
+            self.log_test("/experience?limit", "FAIL", f"HTTP {status}: {data}")
+            return
+        expected_ids = [entry["id"] for entry in data["data"]]
+        
+        # Walk every page, following next_cursor until it runs out
+        page_ids = []
+        cursor = None
+        for _ in range(len(expected_ids) + 1):
+            params = {"limit": 2, **({"after": cursor} if cursor else {})}
+            status, data = await self.make_request("GET", "/experience", params=params)
+            if status != 200:
+                self.log_test("/experience?limit", "FAIL", f"HTTP {status} for page after {cursor}: {data}")
+                return
+            if len(data["data"]) > 2:
+                self.log_test("/experience?limit", "FAIL", f"Page holds {len(data['data'])} entries, limit was 2")
+                return
+            if "next_cursor" not in data:
+                self.log_test("/experience?limit", "FAIL", "Paged response has no next_cursor field")
+                return
+            page_ids.extend(entry["id"] for entry in data["data"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        
+        if page_ids != expected_ids:
+            self.log_test("/experience?limit", "FAIL", f"Pages returned {page_ids}, expected {expected_ids}")
+            return
+        
+        # Cursors whose order is not a number must be rejected, not passed into the query filter
+        invalid_cursors = {
+            "garbage": "not-a-cursor",
+            "operator": json.dumps([{"$gt": ""}, "0" * 24]),
+            "string order": json.dumps(["1", "0" * 24]),
+            "bool order": json.dumps([True, "0" * 24]),
+            "null order": json.dumps([None, "0" * 24])
+        }
+        for name, raw in invalid_cursors.items():
+            cursor = raw if name == "garbage" else base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+            status, data = await self.make_request("GET", "/experience", params={"limit": 2, "after": cursor})
+            if status != 400:
+                self.log_test("/experience?after", "FAIL", f"Cursor with {name} should be rejected with HTTP 400, got {status}")
+                return
+        
+        self.log_test("/experience?limit", "PASS", f"Paged through {len(page_ids)} entries and rejected {len(invalid_cursors)} invalid cursors")
+    
+    async def test_sparse_fields(self):
+        """Test fields= sparse fieldsets"""
+        status, data = await self.make_request("GET", "/experience", params={"fields": "id"})
+        if status != 200:
+            self.log_test("/experience?fields", "FAIL", f"HTTP {status}: {data}")
+            return
+        extra_fields = sorted({key for entry in data["data"] for key in entry} - {"id"})
+        if not data["data"] or extra_fields:
+            self.log_test("/experience?fields", "FAIL", f"fields=id returned extra fields: {extra_fields}")
+            return
+        
+        # Paged responses sort on `order`, which must not leak into the entries
+        status, data = await self.make_request("GET", "/projects", params={"fields": "title", "limit": 1})
+        if status != 200:
+            self.log_test("/projects?fields", "FAIL", f"HTTP {status}: {data}")
+            return
+        if not data["data"] or set(data["data"][0]) != {"id", "title"}:
+            self.log_test("/projects?fields", "FAIL", f"fields=title returned fields: {list(data['data'][0]) if data['data'] else []}")
+            return
+        
+        status, data = await self.make_request("GET", "/experience", params={"fields": "not_a_field"})
+        if status != 400:
+            self.log_test("/experience?fields", "FAIL", f"Unknown field should be rejected with HTTP 400, got {status}")
+            return
+        
+        self.log_test("/experience?fields", "PASS", "Sparse fieldsets applied and unknown fields rejected")
+    
+    async def test_ndjson_streaming(self):
+        """Test NDJSON streaming of /api/experience"""
+        status, data = await self.make_request("GET", "/experience")
+        if status != 200:
+            self.log_test("/experience (ndjson)", "FAIL", f"HTTP {status}: {data}")
+            return
+        
+        status, headers, body = await self.make_raw_request("GET", f"{BACKEND_URL}/experience", headers={"Accept": NDJSON_MEDIA_TYPE})
+        if status != 200:
+            self.log_test("/experience (ndjson)", "FAIL", f"HTTP {status}: {body[:200]}")
+            return
+        if not headers.get("Content-Type", "").startswith(NDJSON_MEDIA_TYPE):
+            self.log_test("/experience (ndjson)", "FAIL", f"Unexpected content type: {headers.get('Content-Type')}")
+            return
+        
+        try:
+            entries = [json.loads(line) for line in body.splitlines() if line.strip()]
+        except ValueError as e:
+            self.log_test("/experience (ndjson)", "FAIL", f"Stream is not valid NDJSON: {e}")
+            return
+        
+        if [entry.get("id") for entry in entries] != [entry["id"] for entry in data["data"]]:
+            self.log_test("/experience (ndjson)", "FAIL", f"Streamed {len(entries)} entries, JSON response has {len(data['data'])}")
+            return
+        
+        self.log_test("/experience (ndjson)", "PASS", f"Streamed {len(entries)} entries")
+    
+    async def test_conditional_requests(self):
+        """Test ETag revalidation on /api/profile"""
+        status, headers, body = await self.make_raw_request("GET", f"{BACKEND_URL}/profile")
+        if status != 200:
+            self.log_test("/profile (etag)", "FAIL", f"HTTP {status}: {body[:200]}")
+            return
+        
+        etag = headers.get("ETag")
+        if not etag:
+            self.log_test("/profile (etag)", "FAIL", "Response has no ETag header")
+            return
+        
+        status, headers, body = await self.make_raw_request("GET", f"{BACKEND_URL}/profile", headers={"If-None-Match": etag})
+        if status != 304:
+            self.log_test("/profile (etag)", "FAIL", f"Matching If-None-Match should give HTTP 304, got {status}")
+            return
+        if body:
+            self.log_test("/profile (etag)", "FAIL", f"304 response carries a {len(body)} byte body")
+            return
+        
+        self.log_test("/profile (etag)", "PASS", f"Revalidated {etag} with HTTP 304")
+    
+    async def test_health_probes(self):
+        """Test the liveness, readiness and diagnostics endpoints"""
+        expectations = {
+            "/health/live": ("status", "alive"),
+            "/health/ready": ("status", "ready")
+        }
+        for endpoint, (field, expected) in expectations.items():
+            status, data = await self.make_request("GET", endpoint)
+            if status != 200:
+                self.log_test(endpoint, "FAIL", f"HTTP {status}: {data}")
+                return
+            if not self.validate_response_structure(data, endpoint):
+                return
+            if data["data"].get(field) != expected:
+                self.log_test(endpoint, "FAIL", f"{field} is {data['data'].get(field)}, expected {expected}")
+                return
+            self.log_test(endpoint, "PASS", f"{field} is {expected}")
+        
+        # Diagnostics are admin only; without the token they must not be public
+        for endpoint in ("/health/details", "/metrics"):
+            status, data = await self.make_request("GET", endpoint)
+            if status not in (403, 404):
+                self.log_test(endpoint, "FAIL", f"Request without admin token should be refused, got HTTP {status}")
+                return
+        
+        if not ADMIN_TOKEN:
+            self.log_test("/health/details", "PASS", "Refused without admin token; set ADMIN_TOKEN to check its content")
+            return
+        
+        status, data = await self.make_request("GET", "/health/details", headers={"X-Admin-Token": ADMIN_TOKEN})
+        if status != 200:
+            self.log_test("/health/details", "FAIL", f"HTTP {status}: {data}")
+            return
+        if not self.validate_response_structure(data, "/health/details"):
+            return
+        
+        required_detail_fields = ["database", "database_breaker", "connection_pool", "indexes", "cache", "cache_sync"]
+        missing_fields = [field for field in required_detail_fields if field not in data["data"]]
+        if missing_fields:
+            self.log_test("/health/details", "FAIL", f"Missing diagnostics fields: {missing_fields}")
+            return
+        
+        self.log_test("/health/details", "PASS", f"Diagnostics retrieved, indexes ready: {data['data']['indexes'].get('ready')}")
+    
+    async def test_prometheus_metrics(self):
+        """Test the Prometheus /metrics endpoint"""
+        status, headers, body = await self.make_raw_request("GET", METRICS_URL)
+        if status != 200:
+            self.log_test("/metrics", "FAIL", f"HTTP {status}: {body[:200]}")
+            return
+        if not headers.get("Content-Type", "").startswith("text/plain"):
+            self.log_test("/metrics", "FAIL", f"Unexpected content type: {headers.get('Content-Type')}")
+            return
+        
+        text = body.decode()
+        required_metrics = ["http_request_duration_seconds", "http_requests_total", "db_operation_duration_seconds", "cache_hits_total"]
+        missing_metrics = [name for name in required_metrics if f"# TYPE {name} " not in text]
+        if missing_metrics:
+            self.log_test("/metrics", "FAIL", f"Missing metrics: {missing_metrics}")
+            return
+        
+        self.log_test("/metrics", "PASS", f"Exposition has {text.count('# TYPE ')} metric families")
+    
     async def run_all_tests(self):
         """Run all API endpoint tests"""
         print(f"Starting Portfolio API Tests for Lay Been Tan")
@@ -372,6 +662,14 @@ class PortfolioAPITester:
         await self.test_projects_endpoint()
         await self.test_certifications_endpoint()
         await self.test_statistics_endpoint()
+        await self.test_portfolio_endpoint()
+        await self.test_batch_endpoint()
+        await self.test_pagination()
+        await self.test_sparse_fields()
+        await self.test_ndjson_streaming()
+        await self.test_conditional_requests()
+        await self.test_health_probes()
+        await self.test_prometheus_metrics()
         
         # Print summary
         print("\n" + "=" * 60)
@@ -0,0 +1,36 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend modules read their settings at import time, so the environment is set first
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "portfolio_test")
+os.environ.setdefault("CACHE_SYNC_MODE", "off")
+os.environ.setdefault("TRACING_ENABLED", "false")
+
+import database
+
+
+@pytest.fixture
+def mock_mongo(monkeypatch):
+    """Point connect_to_mongo at an in-memory mongomock database"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    monkeypatch.setattr(database, "AsyncIOMotorClient", lambda *args, **kwargs: mongomock_motor.AsyncMongoMockClient())
+
+
+@pytest.fixture
+def client(mock_mongo):
+    """A TestClient of the API, started against a seeded mongomock database"""
+    from fastapi.testclient import TestClient
+    import seed_data
+    import server
+
+    database.query_cache.clear()
+    server.response_cache.clear()
+    with TestClient(server.app) as test_client:
+        test_client.portal.call(seed_data.seed_database)
+        yield test_client
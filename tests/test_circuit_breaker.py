@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+from pymongo.errors import OperationFailure, ServerSelectionTimeoutError
+
+import database
+from database import CircuitBreaker, DatabaseUnavailable
+
+
+def make_breaker(failure_threshold: int = 3, reset_timeout: float = 30) -> CircuitBreaker:
+    return CircuitBreaker(enabled=True, failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+
+
+async def unreachable():
+    raise ServerSelectionTimeoutError("no servers")
+
+
+async def answered():
+    return "ok"
+
+
+def fail(breaker: CircuitBreaker, times: int):
+    for _ in range(times):
+        with pytest.raises(DatabaseUnavailable):
+            asyncio.run(breaker.call(unreachable))
+
+
+def expire_cool_down(breaker: CircuitBreaker):
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_opens_after_consecutive_failures():
+    breaker = make_breaker(failure_threshold=3)
+    fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    fail(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 1
+    assert breaker.retry_after() > 0
+
+
+def test_success_resets_the_failure_count():
+    breaker = make_breaker(failure_threshold=3)
+    fail(breaker, 2)
+    assert asyncio.run(breaker.call(answered)) == "ok"
+    fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_rejects_without_calling():
+    breaker = make_breaker(failure_threshold=1)
+    fail(breaker, 1)
+
+    calls = []
+
+    async def operation():
+        calls.append(1)
+
+    with pytest.raises(DatabaseUnavailable) as raised:
+        asyncio.run(breaker.call(operation))
+    assert not calls
+    assert raised.value.retry_after > 0
+    assert breaker.rejections == 1
+
+
+def test_half_open_probe_closes_on_success():
+    breaker = make_breaker(failure_threshold=1)
+    fail(breaker, 1)
+    expire_cool_down(breaker)
+
+    assert asyncio.run(breaker.call(answered)) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert not breaker.probing
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = make_breaker(failure_threshold=3)
+    fail(breaker, 3)
+    expire_cool_down(breaker)
+
+    fail(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() > 0
+
+
+def test_only_one_probe_at_a_time():
+    breaker = make_breaker(failure_threshold=1)
+    fail(breaker, 1)
+    expire_cool_down(breaker)
+
+    async def probe_and_follow():
+        release = asyncio.Event()
+
+        async def slow_probe():
+            await release.wait()
+            return "probe"
+
+        probe = asyncio.ensure_future(breaker.call(slow_probe))
+        await asyncio.sleep(0)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(DatabaseUnavailable):
+            await breaker.call(answered)
+        release.set()
+        return await probe
+
+    assert asyncio.run(probe_and_follow()) == "probe"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_server_errors_do_not_count_as_failures():
+    breaker = make_breaker(failure_threshold=1)
+
+    async def rejected():
+        raise OperationFailure("bad query")
+
+    with pytest.raises(OperationFailure):
+        asyncio.run(breaker.call(rejected))
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_deadline_counts_as_failure():
+    breaker = make_breaker(failure_threshold=1)
+
+    async def hangs():
+        await asyncio.sleep(1)
+
+    with pytest.raises(DatabaseUnavailable):
+        asyncio.run(breaker.call(hangs, timeout=0.01))
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker(enabled=False, failure_threshold=1, reset_timeout=30)
+    fail(breaker, 3)
+    assert asyncio.run(breaker.call(answered)) == "ok"
+
+
+def test_ndjson_stream_failures_return_503_and_open_the_breaker(client, monkeypatch):
+    from mongomock_motor import AsyncCursor
+
+    breaker = make_breaker(failure_threshold=5, reset_timeout=30)
+    monkeypatch.setattr(database, "database_breaker", breaker)
+    # Resolves and caches the active profile, so only the streamed cursor fails below
+    assert client.get("/api/experience").status_code == 200
+
+    async def no_servers(self, length=None):
+        raise ServerSelectionTimeoutError("no servers")
+
+    monkeypatch.setattr(AsyncCursor, "to_list", no_servers)
+    responses = [client.get("/api/experience", headers={"Accept": "application/x-ndjson"}) for _ in range(6)]
+
+    assert [response.status_code for response in responses] == [503] * 6
+    assert all(response.headers.get("retry-after") for response in responses)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.failures == 5
+    assert breaker.rejections == 1
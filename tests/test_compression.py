@@ -0,0 +1,71 @@
+import gzip
+
+import pytest
+
+from response_cache import COMPRESSORS, negotiate_encoding
+
+PREFERRED = next(iter(COMPRESSORS))
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, br", PREFERRED),
+    ("GZIP;q=0.5", "gzip"),
+    ("*", PREFERRED),
+    ("*;q=0, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=bogus", None),
+    ("br;q=0.2, gzip;q=0.8", "gzip")
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_brotli_preferred_when_installed():
+    pytest.importorskip("brotli")
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+
+
+def test_cached_responses_are_compressed(client):
+    response = client.get("/api/experience", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert response.json()["success"]
+
+
+def test_uncached_responses_are_compressed(client):
+    response = client.post("/api/batch", json={"sections": ["profile", "experience", "projects"]}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json()["success"]
+
+
+def test_streams_are_compressed(client):
+    plain = client.get("/api/experience", headers={**NDJSON, "Accept-Encoding": "identity"})
+    response = client.get("/api/experience", headers={**NDJSON, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == plain.content
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get("/api/health/live", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_compression_does_not_need_the_cache(client, monkeypatch):
+    from response_cache import response_cache
+
+    monkeypatch.setattr(response_cache, "enabled", False)
+    response = client.get("/api/experience", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["success"]
+
+
+def test_gzip_variant_is_deterministic():
+    body = b'{"data": "x"}' * 200
+    assert COMPRESSORS["gzip"](body) == COMPRESSORS["gzip"](body)
+    assert gzip.decompress(COMPRESSORS["gzip"](body)) == body
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from database import DatabaseService
+from dataloader import DataLoader
+
+PROFILE_IDS = [str(ObjectId()) for _ in range(2)]
+DOCUMENTS = [
+    {"_id": ObjectId(), "profile_id": ObjectId(PROFILE_IDS[0]), "order": 1, "title": "a", "body": "x"},
+    {"_id": ObjectId(), "profile_id": ObjectId(PROFILE_IDS[0]), "order": 2, "title": "b", "body": "y"},
+    {"_id": ObjectId(), "profile_id": ObjectId(PROFILE_IDS[1]), "order": 1, "title": "c", "body": "z"}
+]
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Record the DatabaseService reads the loader issues, answering them from DOCUMENTS"""
+    calls = []
+
+    async def get_documents_by_ids(collection_name, document_ids, projection=None):
+        calls.append(("by_ids", collection_name, list(document_ids), projection))
+        return [dict(document) for document in DOCUMENTS if str(document["_id"]) in document_ids]
+
+    async def get_documents_by_profile_ids(collection_name, profile_ids, sort_field="order", projection=None):
+        calls.append(("by_profile_ids", collection_name, list(profile_ids), projection))
+        return [dict(document) for document in DOCUMENTS if str(document["profile_id"]) in profile_ids]
+
+    async def get_documents_by_profile_id(collection_name, profile_id, sort_field="order", projection=None, limit=None, after=None):
+        calls.append(("page", collection_name, profile_id, limit))
+        return [dict(document) for document in DOCUMENTS if str(document["profile_id"]) == profile_id][:limit]
+
+    monkeypatch.setattr(DatabaseService, "get_documents_by_ids", staticmethod(get_documents_by_ids))
+    monkeypatch.setattr(DatabaseService, "get_documents_by_profile_ids", staticmethod(get_documents_by_profile_ids))
+    monkeypatch.setattr(DatabaseService, "get_documents_by_profile_id", staticmethod(get_documents_by_profile_id))
+    return calls
+
+
+def test_reads_in_one_tick_are_batched_into_one_query(reads):
+    async def run():
+        loader = DataLoader()
+        return await asyncio.gather(*(loader.get_document_by_id("projects", str(document["_id"])) for document in DOCUMENTS))
+
+    documents = asyncio.run(run())
+    assert [document["title"] for document in documents] == ["a", "b", "c"]
+    assert len(reads) == 1
+    assert sorted(reads[0][2]) == sorted(str(document["_id"]) for document in DOCUMENTS)
+
+
+def test_identical_reads_are_deduplicated_and_copied(reads):
+    async def run():
+        loader = DataLoader()
+        return await asyncio.gather(*(loader.get_documents_by_profile_id("projects", PROFILE_IDS[0]) for _ in range(3)))
+
+    first, second, _ = asyncio.run(run())
+    assert len(reads) == 1
+    assert first == second
+    first[0]["title"] = "changed"
+    assert second[0]["title"] == "a"
+
+
+def test_profile_reads_are_grouped_per_profile(reads):
+    async def run():
+        loader = DataLoader()
+        return await asyncio.gather(*(loader.get_documents_by_profile_id("projects", profile_id) for profile_id in PROFILE_IDS))
+
+    first, second = asyncio.run(run())
+    assert [document["title"] for document in first] == ["a", "b"]
+    assert [document["title"] for document in second] == ["c"]
+    assert reads == [("by_profile_ids", "projects", sorted(PROFILE_IDS), None)]
+
+
+def test_batched_projections_are_merged_and_reapplied(reads):
+    async def run():
+        loader = DataLoader()
+        return await asyncio.gather(
+            loader.get_documents_by_profile_id("projects", PROFILE_IDS[0], projection={"title": 1}),
+            loader.get_documents_by_profile_id("projects", PROFILE_IDS[1], projection={"body": 1})
+        )
+
+    titles, bodies = asyncio.run(run())
+    assert reads[0][3] == {"title": 1, "body": 1, "profile_id": 1, "order": 1}
+    assert set(titles[0]) == {"_id", "title"}
+    assert set(bodies[0]) == {"_id", "body"}
+
+
+def test_pages_are_deduplicated_but_not_batched(reads):
+    async def run():
+        loader = DataLoader()
+        return await asyncio.gather(
+            loader.get_documents_by_profile_id("projects", PROFILE_IDS[0], limit=1),
+            loader.get_documents_by_profile_id("projects", PROFILE_IDS[0], limit=1),
+            loader.get_documents_by_profile_id("projects", PROFILE_IDS[1], limit=1)
+        )
+
+    asyncio.run(run())
+    assert sorted(call[2] for call in reads) == sorted(PROFILE_IDS)
+    assert all(call[0] == "page" for call in reads)
+
+
+def test_failed_batch_fails_every_caller(monkeypatch):
+    async def failing(collection_name, document_ids, projection=None):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(DatabaseService, "get_documents_by_ids", staticmethod(failing))
+
+    async def run():
+        loader = DataLoader()
+        return await asyncio.gather(
+            *(loader.get_document_by_id("projects", str(document["_id"])) for document in DOCUMENTS),
+            return_exceptions=True
+        )
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+
+
+def test_cleared_collection_is_read_again(reads):
+    async def run():
+        loader = DataLoader()
+        await loader.get_documents_by_profile_id("projects", PROFILE_IDS[0])
+        loader.clear_collection("projects")
+        await loader.get_documents_by_profile_id("projects", PROFILE_IDS[0])
+
+    asyncio.run(run())
+    assert len(reads) == 2
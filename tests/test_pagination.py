@@ -0,0 +1,56 @@
+import base64
+import json
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from server import decode_cursor, encode_cursor
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("order", [0, 3, 2.5, -1])
+def test_cursor_round_trip(order):
+    document_id = ObjectId()
+    assert decode_cursor(encode_cursor(order, document_id)) == (order, str(document_id))
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    raw_cursor([{"$gt": ""}, str(ObjectId())]),
+    raw_cursor(["1", str(ObjectId())]),
+    raw_cursor([True, str(ObjectId())]),
+    raw_cursor([None, str(ObjectId())]),
+    raw_cursor([[1], str(ObjectId())]),
+    raw_cursor([1, "not-an-object-id"]),
+    raw_cursor([1, {"$ne": None}]),
+    raw_cursor([1])
+])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+def test_pages_follow_next_cursor(client):
+    expected = [entry["id"] for entry in client.get("/api/experience").json()["data"]]
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        page = client.get("/api/experience", params=params).json()
+        assert len(page["data"]) <= 2
+        seen.extend(entry["id"] for entry in page["data"])
+        if not page["next_cursor"]:
+            break
+        params = {"limit": 2, "after": page["next_cursor"]}
+
+    assert seen == expected
+
+
+def test_invalid_cursor_is_a_bad_request(client):
+    response = client.get("/api/experience", params={"limit": 2, "after": raw_cursor([{"$gt": ""}, str(ObjectId())])})
+    assert response.status_code == 400
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+import database
+from database import QueryCache, SingleFlight, cached_query
+
+
+def make_cache(max_entries: int = 10, ttl: float = 60) -> QueryCache:
+    return QueryCache(enabled=True, max_entries=max_entries, default_ttl=ttl, ttls={})
+
+
+def test_hits_return_copies():
+    cache = make_cache()
+    cache.set("projects", ("key",), {"items": [1]}, cache.generation("projects"))
+
+    found, value = cache.get(("key",))
+    assert found
+    value["items"].append(2)
+    assert cache.get(("key",)) == (True, {"items": [1]})
+
+
+def test_results_loaded_during_a_write_are_not_cached():
+    cache = make_cache()
+    generation = cache.generation("projects")
+    cache.invalidate_collection("projects")
+    cache.set("projects", ("key",), "stale", generation)
+
+    assert cache.get(("key",)) == (False, None)
+
+
+def test_invalidation_drops_only_that_collection():
+    cache = make_cache()
+    cache.set("projects", ("projects",), 1, 0)
+    cache.set("skills", ("skills",), 2, 0)
+    cache.invalidate_collection("projects")
+
+    assert cache.get(("projects",)) == (False, None)
+    assert cache.get(("skills",)) == (True, 2)
+
+
+def test_expired_entries_miss():
+    cache = make_cache(ttl=60)
+    cache.set("projects", ("key",), 1, 0)
+    cache._entries[("key",)] = (time.monotonic() - 1, "projects", 1)
+
+    assert cache.get(("key",)) == (False, None)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(max_entries=2)
+    cache.set("projects", ("a",), 1, 0)
+    cache.set("projects", ("b",), 2, 0)
+    cache.get(("a",))
+    cache.set("projects", ("c",), 3, 0)
+
+    assert cache.get(("b",)) == (False, None)
+    assert cache.get(("a",)) == (True, 1)
+    assert cache.evictions == 1
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = make_cache()
+    monkeypatch.setattr(database, "query_cache", cache)
+    monkeypatch.setattr(database, "single_flight", SingleFlight(enabled=True))
+    return cache
+
+
+def test_read_racing_a_write_is_not_cached_or_joined(fresh_cache):
+    loads = []
+    release = []
+
+    @cached_query
+    async def read(collection_name: str):
+        loads.append(fresh_cache.generation(collection_name))
+        await release[0].wait()
+        return len(loads)
+
+    async def started(count: int):
+        for _ in range(10):
+            if len(loads) >= count:
+                return
+            await asyncio.sleep(0)
+
+    async def run():
+        release.append(asyncio.Event())
+        before_write = asyncio.ensure_future(read("projects"))
+        await started(1)
+        fresh_cache.invalidate_collection("projects")
+        # A caller arriving after the write must not join the load that started before it
+        after_write = asyncio.ensure_future(read("projects"))
+        await started(2)
+        release[0].set()
+        await asyncio.gather(before_write, after_write)
+
+    asyncio.run(run())
+    assert loads == [0, 1]
+    # Only the load that started after the write was cached
+    assert fresh_cache.stats()["entries"] == 1
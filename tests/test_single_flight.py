@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from database import SingleFlight
+
+
+def test_concurrent_identical_loads_run_once():
+    single_flight = SingleFlight(enabled=True)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+
+    async def run():
+        return await asyncio.gather(*(single_flight.run(("key",), load) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [{"value": 1}] * 5
+    assert single_flight.coalesced == 4
+    assert single_flight.max_waiters == 5
+    assert single_flight.stats()["in_flight"] == 0
+    assert single_flight.stats()["waiters"] == 0
+
+
+def test_followers_get_their_own_copy():
+    single_flight = SingleFlight(enabled=True)
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return {"items": [1, 2]}
+
+    async def run():
+        return await asyncio.gather(*(single_flight.run(("key",), load) for _ in range(3)))
+
+    leader, *followers = asyncio.run(run())
+    leader["items"].append(3)
+    assert all(follower == {"items": [1, 2]} for follower in followers)
+    assert followers[0] is not followers[1]
+
+
+def test_cancelled_caller_does_not_cancel_the_load():
+    single_flight = SingleFlight(enabled=True)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "loaded"
+
+    async def run():
+        leader = asyncio.ensure_future(single_flight.run(("key",), load))
+        follower = asyncio.ensure_future(single_flight.run(("key",), load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "loaded"
+    assert len(calls) == 1
+
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    single_flight = SingleFlight(enabled=True)
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(*(single_flight.run(("key",), failing) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def succeeding():
+        return "ok"
+
+    assert asyncio.run(single_flight.run(("key",), succeeding)) == "ok"
+
+
+def test_different_keys_load_separately():
+    single_flight = SingleFlight(enabled=True)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(single_flight.run(("a",), load), single_flight.run(("b",), load))
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert single_flight.coalesced == 0
+
+
+def test_disabled_single_flight_loads_every_time():
+    single_flight = SingleFlight(enabled=False)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(single_flight.run(("key",), load) for _ in range(3)))
+
+    asyncio.run(run())
+    assert len(calls) == 3